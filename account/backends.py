@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+
+def get_user_cache():
+    return caches[getattr(settings, 'ACCOUNT_USER_CACHE', 'default')]
+
+
+def user_cache_key(user_id):
+    return 'account:user:%s' % user_id
+
+
+def forget_cached_user(user_id):
+    get_user_cache().delete(user_cache_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    Model backend keeping the accounts loaded for the sessions in the
+    cache, so an authenticated request does not query the database to
+    find its user. Account.save() and delete() drop the cached copy.
+    """
+
+    def get_user(self, user_id):
+        cache = get_user_cache()
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super(CachedModelBackend, self).get_user(user_id)
+            if user is not None:
+                cache.set(key, user, getattr(settings, 'ACCOUNT_USER_CACHE_TIMEOUT', 3600))
+        return user
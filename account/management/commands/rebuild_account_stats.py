@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from account.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the questions, answers and solutions statistics of accounts'
+
+    def handle(self, *args, **options):
+        rebuild_stats()
+        self.stdout.write('Account statistics have been rebuilt.')
@@ -1,6 +1,7 @@
 from django.db import models
 from django.core.exceptions import ValidationError
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
+from .backends import forget_cached_user
 
 # Create your models here.
 
@@ -73,21 +74,52 @@ class Account(AbstractBaseUser):
         if not kwargs.get('email') and not self.email:
             raise ValidationError('We need your email')
         super(Account, self).save(*args, **kwargs)
+        forget_cached_user(self.pk)
+
+    def delete(self, *args, **kwargs):
+        pk = self.pk
+        super(Account, self).delete(*args, **kwargs)
+        forget_cached_user(pk)
+
+    def get_stats(self):
+        """
+        Return the statistics of the account, an empty record if it has
+        never asked or answered.
+        """
+        try:
+            return self.stats
+        except AccountStats.DoesNotExist:
+            return AccountStats(account=self)
 
     @property
     def questions_count(self):
-        return self.own_questions.count()
+        return self.get_stats().questions_count
 
     @property
     def answers_count(self):
-        return self.own_answers.count()
+        return self.get_stats().answers_count
 
     @property
     def solution_percent(self):
-        solutions = self.own_answers.filter(solution=True).count()
-        if self.answers_count == 0:
+        stats = self.get_stats()
+        if stats.answers_count == 0:
             return 0
-        return int(solutions/self.answers_count*100)
+        return int(stats.solutions_count/stats.answers_count*100)
+
+
+class AccountStats(models.Model):
+    """
+    Numbers of questions, answers and solutions of an account. Kept up to
+    date by the questions signal handlers, recomputed by the
+    rebuild_account_stats command.
+    """
+    account = models.OneToOneField(Account, primary_key=True, related_name='stats')
+    questions_count = models.PositiveIntegerField(default=0)
+    answers_count = models.PositiveIntegerField(default=0)
+    solutions_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return '%s: %s/%s/%s' % (self.account_id, self.questions_count, self.answers_count, self.solutions_count)
 
 
 class ConfirmationLink(models.Model):
@@ -1,3 +1,4 @@
+from django.db.models import Manager
 from rest_framework import serializers
 from questions.models import Answer, Question
 from .models import Account
@@ -9,10 +10,24 @@ class ShortenedContentField(serializers.CharField):
 		return value[:50]
 
 
+class LatestRowsListSerializer(serializers.ListSerializer):
+	"""
+	Renders only the latest rows of a related manager, the account
+	questions and answers routes paginate through all of them.
+	"""
+	limit = 20
+
+	def to_representation(self, data):
+		if isinstance(data, Manager):
+			data = data.order_by('-created_at', '-id')[:self.limit]
+		return super(LatestRowsListSerializer, self).to_representation(data)
+
+
 class ForAccountQuestionSerializer(serializers.ModelSerializer):
 
 	class Meta:
 		model = Question
+		list_serializer_class = LatestRowsListSerializer
 		fields = (
 			'id',
 			'summary',
@@ -27,6 +42,7 @@ class ForAccountAnswerSerializer(serializers.ModelSerializer):
 
 	class Meta:
 		model = Answer
+		list_serializer_class = LatestRowsListSerializer
 		fields = (
 			'id',
 			'content',
@@ -39,16 +55,34 @@ class ForAccountAnswerSerializer(serializers.ModelSerializer):
 class AccountSerializer(serializers.ModelSerializer):
 	own_questions = ForAccountQuestionSerializer(read_only=True, many=True)
 	own_answers = ForAccountAnswerSerializer(read_only=True, many=True)
+	questions_count = serializers.ReadOnlyField()
+	answers_count = serializers.ReadOnlyField()
 
 	class Meta:
 		model = Account
 		fields = (
 			'id',
+			'questions_count',
+			'answers_count',
 			'own_questions',
 			'own_answers',
 		)
 
 
+class AccountSummarySerializer(serializers.ModelSerializer):
+	questions_count = serializers.ReadOnlyField()
+	answers_count = serializers.ReadOnlyField()
+
+	class Meta:
+		model = Account
+		fields = (
+			'id',
+			'username',
+			'questions_count',
+			'answers_count',
+		)
+
+
 
 class ForQuestionsAccountSerializer(serializers.ModelSerializer):
 
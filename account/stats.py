@@ -0,0 +1,76 @@
+from collections import defaultdict
+from django.db import transaction, IntegrityError
+from django.db.models import F, Count
+from questions.models import Question, Answer
+from .models import AccountStats
+
+
+BULK_CREATE_CHUNK = 500
+
+
+def stats_key(instance):
+    """
+    Return (author_id, solution) of a question or an answer, or None if
+    those fields are deferred (reading them would hit the database).
+    """
+    values = instance.__dict__
+    if 'author_id' not in values or (isinstance(instance, Answer) and 'solution' not in values):
+        return None
+    return values['author_id'], values.get('solution', False)
+
+
+def stats_deltas(model, key, sign):
+    """
+    Return the changes to the statistics of the author of a question or
+    an answer with the given key being added (sign 1) or removed (-1).
+    """
+    author_id, solution = key
+    if model is Question:
+        return {'questions_count': sign}
+    return {'answers_count': sign, 'solutions_count': sign if solution else 0}
+
+
+def shift_stats(account_id, deltas):
+    """
+    Atomically shift the statistics of an account, creating its record on
+    the first question or answer. Counters never drop below zero.
+    """
+    if account_id is None:
+        return
+    for field, delta in deltas.items():
+        if not delta:
+            continue
+        queryset = AccountStats.objects.filter(account_id=account_id)
+        if delta < 0:
+            queryset = queryset.filter(**{'%s__gte' % field: -delta})
+        if queryset.update(**{field: F(field) + delta}) or delta < 0:
+            continue
+        try:
+            with transaction.atomic():
+                AccountStats.objects.create(account_id=account_id, **{field: delta})
+        except IntegrityError:
+            queryset.update(**{field: F(field) + delta})
+
+
+def _stats_sources():
+    yield 'questions_count', Question.objects.all()
+    yield 'answers_count', Answer.objects.all()
+    yield 'solutions_count', Answer.objects.filter(solution=True)
+
+
+def rebuild_stats():
+    """
+    Recompute the statistics of every account from scratch with one
+    grouped query per counter, and write them back in bulk.
+    """
+    with transaction.atomic():
+        stats = defaultdict(dict)
+        for field, source in _stats_sources():
+            rows = source.exclude(author=None).values_list('author_id').annotate(value=Count('id')).order_by()
+            for account_id, value in rows:
+                stats[account_id][field] = value
+        AccountStats.objects.all().delete()
+        AccountStats.objects.bulk_create(
+            [AccountStats(account_id=account_id, **fields) for account_id, fields in stats.items()],
+            batch_size=BULK_CREATE_CHUNK
+        )
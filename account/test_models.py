@@ -1,7 +1,9 @@
 from django.test import TestCase
 from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.utils.six import StringIO
 from questions.models import Question, Answer, Comment, Like
-from .models import Account
+from .models import Account, AccountStats
 
 
 class TestAccountModel(TestCase):
@@ -151,6 +153,66 @@ class TestAccountModel(TestCase):
         )
         self.assertEqual(account.solution_percent, 50)
 
+    def test_stats_follow_questions_and_answers(self):
+        account = self.create_ordinary_account()
+        question = Question.objects.create(
+            summary='Some summary',
+            content='Some content',
+            author=account
+        )
+        answers = [Answer.objects.create(content='Some content', question=question, author=account)
+                   for n in range(4)]
+        answers[0].solution = True
+        answers[0].save()
+        stats = AccountStats.objects.get(account=account)
+        self.assertEqual((stats.questions_count, stats.answers_count, stats.solutions_count), (1, 4, 1))
+        answers[0].solution = False
+        answers[0].save()
+        answers[1].solution = True
+        answers[1].save()
+        answers[1].delete()
+        stats = AccountStats.objects.get(account=account)
+        self.assertEqual((stats.questions_count, stats.answers_count, stats.solutions_count), (1, 3, 0))
+        question.delete()
+        stats = AccountStats.objects.get(account=account)
+        self.assertEqual((stats.questions_count, stats.answers_count, stats.solutions_count), (0, 0, 0))
+
+    def test_stats_read_in_one_query(self):
+        account = self.create_ordinary_account()
+        question = Question.objects.create(
+            summary='Some summary',
+            content='Some content',
+            author=account
+        )
+        for solution in (True, False, False, False):
+            Answer.objects.create(
+                content='Some content',
+                question=question,
+                author=account,
+                solution=solution
+            )
+        with self.assertNumQueries(1):
+            account = Account.objects.select_related('stats').get(pk=account.pk)
+            stats = (account.questions_count, account.answers_count, account.solution_percent)
+        self.assertEqual(stats, (1, 4, 25))
+
+    def test_account_without_stats(self):
+        account = self.create_ordinary_account()
+        self.assertEqual((account.questions_count, account.answers_count, account.solution_percent), (0, 0, 0))
+
+    def test_rebuild_account_stats(self):
+        account = self.create_ordinary_account()
+        question = Question.objects.create(
+            summary='Some summary',
+            content='Some content',
+            author=account
+        )
+        Answer.objects.create(content='Some content', question=question, author=account, solution=True)
+        AccountStats.objects.all().update(questions_count=7, solutions_count=0)
+        call_command('rebuild_account_stats', stdout=StringIO())
+        stats = AccountStats.objects.get(account=account)
+        self.assertEqual((stats.questions_count, stats.answers_count, stats.solutions_count), (1, 1, 1))
+
     def test_reverse_questions(self):
         account = self.create_ordinary_account()
         question1 = Question.objects.create(
@@ -1,6 +1,14 @@
+import json
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.core.cache import cache
+from django.contrib.auth import BACKEND_SESSION_KEY
 from django.core.urlresolvers import reverse
+from rest_framework.test import APITestCase
+from questions.models import Question, Answer
 from .models import Account
+from .backends import CachedModelBackend
 
 
 # =======================================================
@@ -197,4 +205,96 @@ class LogOutViewTest(CreateValidUserMixin, TestCase):
         self.create_user()
         self.client.login(username='Andrew', password='homm1994')
         self.client.get(reverse('account:logout'))
-        self.assertNotIn('_auth_user_id', self.client.session)
\ No newline at end of file
+        self.assertNotIn('_auth_user_id', self.client.session)
+
+
+class CachedAuthTest(CreateValidUserMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.account = self.create_user()
+        self.client.login(username='Andrew', password='homm1994')
+
+    def auth_queries(self, queries):
+        return [query for query in queries if 'django_session' in query['sql'] or
+                'WHERE "account_account"."id" = %d' % self.account.id in query['sql']]
+
+    def test_authenticated_pages_do_not_query_for_auth(self):
+        self.client.get(reverse('questions:questions_latest'))
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('questions:questions_latest'))
+        self.assertEqual(response.context['user'], self.account)
+        self.assertEqual(self.auth_queries(context.captured_queries), [])
+
+    def test_keeps_sessions_of_model_backend(self):
+        session = self.client.session
+        session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+        session.save()
+        response = self.client.get(reverse('questions:questions_latest'))
+        self.assertEqual(response.context['user'], self.account)
+
+    def test_saving_account_drops_cached_user(self):
+        backend = CachedModelBackend()
+        backend.get_user(self.account.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(backend.get_user(self.account.id).tagline, '')
+        self.account.tagline = 'New tagline'
+        self.account.save()
+        self.assertEqual(backend.get_user(self.account.id).tagline, 'New tagline')
+        self.account.delete()
+        self.assertIsNone(backend.get_user(self.account.id))
+
+
+class AccountViewSetTest(CreateValidUserMixin, APITestCase):
+
+    def test_streams_accounts(self):
+        account = self.create_user()
+        Question.objects.create(summary='Some title', content='Some text', author=account)
+        self.client.force_authenticate(user=account)
+        response = self.client.get(reverse('account:account-list'), {'stream': '1'})
+        data = json.loads(b''.join(response.streaming_content).decode('utf-8'))
+        self.assertEqual(data, [{'id': account.id, 'username': 'Andrew', 'questions_count': 1, 'answers_count': 0}])
+
+    def test_profile_has_a_fixed_number_of_queries(self):
+        account = self.create_user()
+        questions = [Question.objects.create(summary='Title %d' % n, content='Text', author=account)
+                     for n in range(25)]
+        for n in range(30):
+            Answer.objects.create(content='Answer %d' % n, question=questions[0], author=account,
+                                  solution=n < 3)
+        self.client.force_authenticate(user=account)
+        # account with counts, latest questions, latest answers
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('account:account-detail', args=(account.id,)))
+        self.assertEqual((response.data['questions_count'], response.data['answers_count']), (25, 30))
+        self.assertEqual(len(response.data['own_questions']), 20)
+        self.assertEqual(response.data['own_questions'][0]['summary'], 'Title 24')
+        self.assertEqual(response.data['own_questions'][0]['likes_count'], 0)
+        self.assertEqual(response.data['own_answers'][0]['content'], 'Answer 29')
+
+    def test_paginates_nested_rows(self):
+        account = self.create_user()
+        for n in range(25):
+            Answer.objects.create(
+                content='Answer %d' % n,
+                question=Question.objects.create(summary='Title', content='Text', author=account),
+                author=account
+            )
+        self.client.force_authenticate(user=account)
+        url = reverse('account:account-answers', args=(account.id,))
+        response = self.client.get(url)
+        self.assertEqual([answer['content'] for answer in response.data], ['Answer %d' % n for n in range(24, 4, -1)])
+        response = self.client.get(response['Link'][1:response['Link'].index('>')])
+        self.assertEqual([answer['content'] for answer in response.data], ['Answer %d' % n for n in range(4, -1, -1)])
+        response = self.client.get(reverse('account:account-questions', args=(account.id,)))
+        self.assertEqual(len(response.data), 20)
+
+    def test_lists_accounts_with_counts(self):
+        account = self.create_user()
+        Question.objects.create(summary='Title', content='Text', author=account)
+        self.client.force_authenticate(user=account)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('account:account-list'))
+        self.assertEqual(response.data, [
+            {'id': account.id, 'username': 'Andrew', 'questions_count': 1, 'answers_count': 0},
+        ])
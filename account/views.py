@@ -6,9 +6,18 @@ from django.views.generic.base import RedirectView
 from django.views.generic.edit import FormView
 from django.contrib.auth import login, logout
 from django.contrib.auth.forms import AuthenticationForm
+from django.shortcuts import get_object_or_404
 from rest_framework.viewsets import ModelViewSet
+from rest_framework.decorators import detail_route
+from tost.streaming import StreamingListMixin
+from questions.pagination import LinkHeaderCursorPagination
 from .forms import CreateAccountForm, UpdateAccountForm
-from .serializers import AccountSerializer
+from .serializers import (
+    AccountSerializer,
+    AccountSummarySerializer,
+    ForAccountQuestionSerializer,
+    ForAccountAnswerSerializer,
+)
 from .permissions import IsAuthenticatedOrNotAllowed, IsOwnerOrReadOnly
 from .tasks import send_login_email, send_account_change_email, send_verification_email
 from .models import Account
@@ -44,7 +53,7 @@ class RedirectAuthedUserMixin(object):
 
 
 class ProfileView(RedirectAnonUserMixin, DetailView):
-    model = Account
+    queryset = Account.objects.select_related('stats')
     template_name = 'account/profile.html'
     context_object_name = 'account'
 
@@ -139,10 +148,54 @@ class VerificationView(View):
 # =====================================================
 
 
-class AccountViewSet(ModelViewSet):
+class AccountViewSet(StreamingListMixin, ModelViewSet):
+    """
+    Accounts, cursor paginated. The list shows the numbers of questions
+    and answers of every account, an account also shows its latest ones,
+    the `questions` and `answers` routes paginate through all of them.
+    """
     queryset = Account.objects.all()
     serializer_class = AccountSerializer
     permission_classes = (
         IsOwnerOrReadOnly,
         IsAuthenticatedOrNotAllowed,
     )
+    pagination_class = LinkHeaderCursorPagination
+
+    def get_queryset(self):
+        if self.action in ('list', 'retrieve'):
+            return Account.objects.select_related('stats')
+        return Account.objects.all()
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return AccountSummarySerializer
+        return AccountSerializer
+
+    def list(self, request, *args, **kwargs):
+        if self.wants_stream(request):
+            return self.stream_list(
+                request,
+                self.filter_queryset(self.get_queryset()),
+                self.get_serializer_class(),
+                context=self.get_serializer_context()
+            )
+        return super(AccountViewSet, self).list(request, *args, **kwargs)
+
+    def nested_page(self, request, queryset, serializer_class):
+        paginator = LinkHeaderCursorPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = serializer_class(page, many=True, context=self.get_serializer_context())
+        return paginator.get_paginated_response(serializer.data)
+
+    @detail_route(methods=['get'])
+    def questions(self, request, pk=None):
+        account = get_object_or_404(Account, pk=pk)
+        self.check_object_permissions(request, account)
+        return self.nested_page(request, account.own_questions.all(), ForAccountQuestionSerializer)
+
+    @detail_route(methods=['get'])
+    def answers(self, request, pk=None):
+        account = get_object_or_404(Account, pk=pk)
+        self.check_object_permissions(request, account)
+        return self.nested_page(request, account.own_answers.all(), ForAccountAnswerSerializer)
@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class QuestionsConfig(AppConfig):
+    name = 'questions'
+
+    def ready(self):
+        from . import signals
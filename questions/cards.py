@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+
+CARD_TEMPLATE = 'questions/question_card.html'
+
+CARD_TIMEOUT = 60 * 60 * 24
+
+
+def card_key(question):
+    """
+    Cache key of a rendered question card. Question.version is bumped on
+    every change of the question, its answers, comments and likes, so an
+    outdated card is never looked up again and simply expires.
+    """
+    return 'question-card:%d:%d' % (question.pk, question.version)
+
+
+def render_cards(questions):
+    """
+    Return (question, html) pairs for the given questions, fetching all
+    cached cards with a single multi-get and caching the rendered ones.
+    """
+    cache = caches[getattr(settings, 'QUESTIONS_CARDS_CACHE', 'default')]
+    keys = [card_key(question) for question in questions]
+    cached = cache.get_many(keys)
+    rendered = {}
+    cards = []
+    for key, question in zip(keys, questions):
+        html = cached.get(key)
+        if html is None:
+            html = rendered[key] = render_to_string(CARD_TEMPLATE, {'question': question})
+        cards.append((question, mark_safe(html)))
+    if rendered:
+        cache.set_many(rendered, CARD_TIMEOUT)
+    return cards
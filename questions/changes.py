@@ -0,0 +1,73 @@
+from datetime import timedelta
+from django.db.models import Max, Min
+from django.utils import timezone
+from .models import Question, Answer, QuestionChange
+from .counters import get_target, get_cached_target
+from .push import publish_change
+
+
+LIKES_KINDS = {
+    Question: QuestionChange.QUESTION_LIKES,
+    Answer: QuestionChange.ANSWER_LIKES,
+}
+
+
+def question_of(model, pk, instance=None):
+    """
+    Return the id of the question a question or an answer belongs to.
+    """
+    if model is Question:
+        return pk
+    if isinstance(instance, Answer):
+        return instance.question_id
+    return Answer.objects.filter(pk=pk).values_list('question_id', flat=True).first()
+
+
+def record_change(question_id, kind, object_id, deleted=False):
+    if question_id is not None:
+        change = QuestionChange.objects.create(question_id=question_id, kind=kind, object_id=object_id, deleted=deleted)
+        publish_change(question_id, change.pk)
+
+
+def record_answer_change(answer, deleted=False):
+    record_change(answer.question_id, QuestionChange.ANSWER, answer.pk, deleted)
+
+
+def record_comment_change(comment, deleted=False):
+    model, pk = get_target(comment)
+    if model is not None:
+        question_id = question_of(model, pk, get_cached_target(comment))
+        record_change(question_id, QuestionChange.COMMENT, comment.pk, deleted)
+
+
+def record_likes_change(model, pk, instance=None):
+    """
+    Record that the likes of a question or an answer have changed.
+    """
+    if model in LIKES_KINDS:
+        record_change(question_of(model, pk, instance), LIKES_KINDS[model], pk)
+
+
+def oldest_cursor():
+    """
+    Return the lowest cursor the change log still has every entry after,
+    older cursors may have missed pruned entries and have to resync.
+    """
+    oldest = QuestionChange.objects.aggregate(oldest=Min('id'))['oldest']
+    return oldest - 1 if oldest else 0
+
+
+def latest_cursor(question_id):
+    latest = QuestionChange.objects.filter(question_id=question_id).aggregate(cursor=Max('id'))['cursor'] or 0
+    return max(latest, oldest_cursor())
+
+
+def prune_changes(days):
+    """
+    Delete the change log entries older than days. The newest entry is
+    always kept, so oldest_cursor() still tells which cursors are stale.
+    """
+    newest = QuestionChange.objects.aggregate(newest=Max('id'))['newest']
+    QuestionChange.objects.filter(
+        created_at__lt=timezone.now() - timedelta(days=days)
+    ).exclude(pk=newest).delete()
@@ -0,0 +1,108 @@
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import F, Count
+from django.contrib.contenttypes.models import ContentType
+from .models import Question, Answer, Comment, Like
+from .ranking import refresh_score
+from .versioning import bump_version
+
+
+# Name of the counter column every counted model contributes to.
+COUNTER_FIELDS = {
+    Answer: 'answers_count',
+    Comment: 'comments_count',
+    Like: 'likes_count',
+}
+
+COUNTED_MODELS = (Question, Answer)
+
+BULK_UPDATE_CHUNK = 500
+
+
+def get_target(instance):
+    """
+    Return (model, pk) of the row whose counter the given answer,
+    comment or like contributes to, or (None, None) if there is none.
+    """
+    if isinstance(instance, Answer):
+        return Question, instance.question_id
+    if instance.content_type_id is None or instance.object_id is None:
+        return None, None
+    model = ContentType.objects.get_for_id(instance.content_type_id).model_class()
+    if model not in COUNTED_MODELS:
+        return None, None
+    return model, instance.object_id
+
+
+def get_cached_target(instance):
+    """
+    Return the target object if it is already loaded on the instance
+    (e.g. it was passed to the constructor), without hitting the database.
+    """
+    if isinstance(instance, Answer):
+        cache_attr = Answer._meta.get_field('question').get_cache_name()
+    else:
+        cache_attr = type(instance).content_object.cache_attr
+    return getattr(instance, cache_attr, None)
+
+
+def change_counter(model, pk, field, delta, instance=None):
+    """
+    Atomically shift the counter column of a single row by delta and
+    mirror the change on an in-memory instance of that row, if given.
+    """
+    queryset = model.objects.filter(pk=pk)
+    if delta < 0:
+        queryset = queryset.filter(**{'%s__gte' % field: -delta})
+    queryset.update(**{field: F(field) + delta})
+    if isinstance(instance, model) and instance.pk == pk:
+        setattr(instance, field, max(getattr(instance, field) + delta, 0))
+
+
+def shift_counter(model, pk, field, delta, instance=None):
+    """
+    Change a counter along with everything derived from it: the score of
+    a liked question and the version of the question the row belongs to.
+    """
+    change_counter(model, pk, field, delta, instance)
+    if model is Question and field == 'likes_count':
+        refresh_score(pk, instance)
+    bump_version(model, pk, instance)
+
+
+def _counter_sources():
+    yield Question, 'answers_count', Answer.objects.values_list('question')
+    for model in COUNTED_MODELS:
+        content_type = ContentType.objects.get_for_model(model)
+        for source, field in ((Comment, 'comments_count'), (Like, 'likes_count')):
+            yield model, field, source.objects.filter(content_type=content_type).values_list('object_id')
+
+
+def _bump_versions(model, pks):
+    if model is Question:
+        Question.objects.filter(pk__in=pks).update(version=F('version') + 1)
+    else:
+        Question.objects.filter(answers__pk__in=pks).update(version=F('version') + 1)
+
+
+def rebuild_counters():
+    """
+    Recompute every counter column from scratch. Only rows whose counter
+    drifted are written, grouped by their new value, so the number of
+    UPDATE queries depends on the number of distinct values rather than on
+    the number of rows. The versions of the affected questions are bumped,
+    so cached cards and ETags pick the fixed counters up.
+    """
+    with transaction.atomic():
+        for model, field, source in _counter_sources():
+            counted = dict(source.annotate(value=Count('id')).order_by())
+            by_value = defaultdict(list)
+            for pk, current in model.objects.values_list('pk', field).iterator():
+                value = counted.get(pk, 0)
+                if value != current:
+                    by_value[value].append(pk)
+            for value, pks in by_value.items():
+                for start in range(0, len(pks), BULK_UPDATE_CHUNK):
+                    chunk = pks[start:start + BULK_UPDATE_CHUNK]
+                    model.objects.filter(pk__in=chunk).update(**{field: value})
+                    _bump_versions(model, chunk)
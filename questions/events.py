@@ -0,0 +1,91 @@
+import time
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+from .push import get_hub, question_channel
+from .read_serializers import read_changes
+
+
+# Seconds between keep-alive comments, the change log is also read then
+# in case a publish was lost.
+HEARTBEAT = 15
+
+# Seconds to wait before reading the log again when a published change
+# is not visible yet (not committed), and how many times to try.
+RETRY_DELAY = 0.5
+RETRIES = 10
+
+# Event name and payload key of every kind of change.
+EVENTS = (
+    ('answer', 'answers'),
+    ('comment', 'comments'),
+    ('like', 'likes'),
+    ('delete', 'deleted'),
+)
+
+
+def format_event(event, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(b'id: ' + str(event_id).encode('ascii'))
+    lines.append(b'event: ' + event.encode('ascii'))
+    lines.append(b'data: ' + JSONRenderer().render(data))
+    return b'\n'.join(lines) + b'\n\n'
+
+
+def render_changes(changes):
+    """
+    Server-sent events of a read_changes() payload. The cursor goes with
+    the last event, so a client reconnecting with Last-Event-ID does not
+    miss the rest of an interrupted batch.
+    """
+    if changes.get('resync'):
+        yield format_event('resync', {}, changes['cursor'])
+        return
+    events = [(event, item) for event, key in EVENTS for item in changes[key]]
+    for position, (event, item) in enumerate(events, 1):
+        yield format_event(event, item, changes['cursor'] if position == len(events) else None)
+
+
+def question_events(request, question_id, cursor, timeout=None):
+    """
+    Long-poll the changes of a question after the cursor as server-sent
+    events. The response ends after the first batch of events or after
+    timeout seconds (QUESTIONS_EVENTS_TIMEOUT), and EventSource reconnects
+    with the last event id, so a sync worker is never held for long. The
+    hub only wakes the stream up, the events are always read from the
+    change log.
+    """
+    if timeout is None:
+        timeout = getattr(settings, 'QUESTIONS_EVENTS_TIMEOUT', 25)
+    deadline = time.time() + timeout
+    subscription = get_hub().subscribe(question_channel(question_id))
+    try:
+        yield b'retry: 1000\n\n'
+        wanted, retries = cursor, 0
+        while True:
+            changes = read_changes(request, question_id, cursor)
+            chunks = list(render_changes(changes))
+            if chunks:
+                for chunk in chunks:
+                    yield chunk
+                return
+            cursor = int(changes['cursor'])
+            if cursor >= wanted or retries >= RETRIES:
+                wanted, retries = cursor, 0
+                wait = HEARTBEAT
+            else:
+                retries += 1
+                wait = RETRY_DELAY
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                # An id without data moves the Last-Event-ID of the client
+                # past the changes it has already seen.
+                yield ('id: %d\n\n' % cursor).encode('ascii')
+                return
+            message = subscription.get(min(wait, remaining))
+            if message is None:
+                yield b': keep-alive\n\n'
+            else:
+                wanted = max(wanted, message)
+    finally:
+        subscription.close()
@@ -0,0 +1,5 @@
+def content_key(instance):
+    """
+    Return (content_type_id, object_id) of a comment or a like.
+    """
+    return instance.content_type_id, instance.object_id
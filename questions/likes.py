@@ -0,0 +1,228 @@
+from collections import OrderedDict, defaultdict
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction, IntegrityError
+from django.db.models.signals import pre_delete, post_delete
+from .models import Like, LikeEvent
+from .counters import COUNTED_MODELS, shift_counter
+from .versioning import bump_version
+from .changes import record_likes_change
+
+
+# Number of events compacted in one transaction.
+COMPACTION_BATCH = 1000
+
+# Number of likes removed by one DELETE statement.
+DELETE_CHUNK = 500
+
+
+def _key(author, obj):
+    return {
+        'author': author,
+        'content_type': ContentType.objects.get_for_model(obj),
+        'object_id': obj.pk,
+    }
+
+
+def is_hot(obj):
+    """
+    Whether likes of obj go through the event log: its likes_count has
+    reached QUESTIONS_HOT_LIKES (None turns the event log off).
+    """
+    threshold = getattr(settings, 'QUESTIONS_HOT_LIKES', None)
+    return threshold is not None and getattr(obj, 'likes_count', 0) >= threshold
+
+
+def _buffered_state(author, obj):
+    """
+    Return whether author likes obj if the like of author on obj is
+    written to the event log, None if it is written to Like directly.
+    Objects with pending events of the author stay buffered until they
+    are compacted, so the events are applied in order.
+    """
+    pending = _pending_state(author, obj)
+    if pending is not None:
+        return pending
+    if is_hot(obj):
+        return Like.objects.filter(**_key(author, obj)).exists()
+    return None
+
+
+def _log(author, obj, liked):
+    LikeEvent.objects.create(liked=liked, **_key(author, obj))
+
+
+def _pending_state(author, obj):
+    return (
+        LikeEvent.objects.filter(**_key(author, obj))
+        .order_by('-id').values_list('liked', flat=True).first()
+    )
+
+
+def shown_likes_count(author, obj):
+    """
+    Return the likes count of obj as author should see it. The stored
+    counter of a hot object catches up on compaction, so the last pending
+    event of author is added to it, unless the Like row of author already
+    agrees with it.
+    """
+    pending = _pending_state(author, obj)
+    if pending is None:
+        return obj.likes_count
+    has_like = Like.objects.filter(**_key(author, obj)).exists()
+    if pending and not has_like:
+        return obj.likes_count + 1
+    if not pending and has_like:
+        return max(obj.likes_count - 1, 0)
+    return obj.likes_count
+
+
+def _delete_likes(pks):
+    """
+    Remove the likes with the given ids and return how many rows were
+    actually deleted. Like.delete() and QuerySet.delete() send post_delete
+    even when a concurrent request removed the row first, and Django does
+    not report the row count, so the DELETE is issued directly.
+    """
+    pks = list(pks)
+    deleted = 0
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        for start in range(0, len(pks), DELETE_CHUNK):
+            chunk = pks[start:start + DELETE_CHUNK]
+            cursor.execute('DELETE FROM %s WHERE %s IN (%s)' % (
+                qn(Like._meta.db_table), qn(Like._meta.pk.column), ', '.join(['%s'] * len(chunk))), chunk)
+            deleted += cursor.rowcount
+    return deleted
+
+
+def delete_like(like):
+    """
+    Delete a like and send its delete signals, which shift the counters
+    and record the change, only if this call removed the row. Return
+    whether it did.
+    """
+    pre_delete.send(sender=Like, instance=like, using=connection.alias)
+    if not _delete_likes([like.pk]):
+        return False
+    post_delete.send(sender=Like, instance=like, using=connection.alias)
+    return True
+
+
+def like_object(author, obj):
+    """
+    Like obj on behalf of author with a single INSERT, into the event log
+    if obj is hot. Return False if the like already exists, which the
+    unique (author, content_type, object_id) index also guarantees under
+    concurrent requests.
+    """
+    state = _buffered_state(author, obj)
+    if state is not None:
+        if state:
+            return False
+        _log(author, obj, True)
+        return True
+    try:
+        with transaction.atomic():
+            Like.objects.create(author=author, content_object=obj)
+    except IntegrityError:
+        return False
+    return True
+
+
+def unlike_object(author, obj):
+    """
+    Remove the like of author from obj, looked up by the unique index,
+    or log the unlike if obj is hot. Return False if there was none.
+    """
+    state = _buffered_state(author, obj)
+    if state is not None:
+        if not state:
+            return False
+        _log(author, obj, False)
+        return True
+    like = Like.objects.filter(**_key(author, obj)).first()
+    if like is None:
+        return False
+    # The deleted like mirrors the counter change on obj itself.
+    setattr(like, Like.content_object.cache_attr, obj)
+    return delete_like(like)
+
+
+def toggle_object_like(author, obj):
+    """
+    Like obj if author has not liked it yet, unlike it otherwise.
+    Return whether obj is liked afterwards.
+    """
+    if unlike_object(author, obj):
+        return False
+    like_object(author, obj)
+    return True
+
+
+def apply_pending_events(author, condition, liked):
+    """
+    Update the set of (content_type_id, object_id) keys liked by author
+    with their not yet compacted events matching condition.
+    """
+    events = (
+        LikeEvent.objects.filter(condition, author=author)
+        .order_by('id').values_list('content_type_id', 'object_id', 'liked')
+    )
+    for content_type_id, object_id, is_liked in events:
+        if is_liked:
+            liked.add((content_type_id, object_id))
+        else:
+            liked.discard((content_type_id, object_id))
+    return liked
+
+
+def compact_like_events(batch_size=COMPACTION_BATCH):
+    """
+    Fold the oldest batch of events into the Like table: only the last
+    event of every author and object counts. Counters of every liked
+    object are shifted once per batch rather than once per event.
+    Return the number of compacted events.
+    """
+    with transaction.atomic():
+        events = list(LikeEvent.objects.select_for_update().order_by('id')[:batch_size])
+        if not events:
+            return 0
+        final = OrderedDict()
+        for event in events:
+            final[(event.author_id, event.content_type_id, event.object_id)] = event.liked
+        existing = {}
+        likes = Like.objects.filter(
+            author_id__in=set(key[0] for key in final),
+            content_type_id__in=set(key[1] for key in final),
+            object_id__in=set(key[2] for key in final),
+        ).values_list('id', 'author_id', 'content_type_id', 'object_id')
+        for pk, author_id, content_type_id, object_id in likes:
+            if (author_id, content_type_id, object_id) in final:
+                existing[author_id, content_type_id, object_id] = pk
+
+        created, removed = [], []
+        deltas = defaultdict(int)
+        for key, liked in final.items():
+            author_id, content_type_id, object_id = key
+            if liked and key not in existing:
+                created.append(Like(author_id=author_id, content_type_id=content_type_id, object_id=object_id))
+                deltas[content_type_id, object_id] += 1
+            elif not liked and key in existing:
+                removed.append(existing[key])
+                deltas[content_type_id, object_id] -= 1
+        Like.objects.bulk_create(created)
+        # Counters are shifted below in one go, so the removed likes are
+        # deleted without their per like signals.
+        _delete_likes(removed)
+        for (content_type_id, object_id), delta in deltas.items():
+            model = ContentType.objects.get_for_id(content_type_id).model_class()
+            if model not in COUNTED_MODELS:
+                continue
+            if delta:
+                shift_counter(model, object_id, 'likes_count', delta)
+            else:
+                bump_version(model, object_id)
+            record_likes_change(model, object_id)
+        LikeEvent.objects.filter(pk__in=[event.pk for event in events]).delete()
+    return len(events)
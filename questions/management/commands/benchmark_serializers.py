@@ -0,0 +1,51 @@
+import timeit
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from account.models import Account
+from questions.models import Question, Answer
+from questions.serializers import QuestionSerializer, AnswerSerializer
+from questions.read_serializers import QuestionReadSerializer, AnswerReadSerializer
+
+
+class Command(BaseCommand):
+    help = 'Compares the read serializers with the model serializers on the existing questions (read only)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=100, help='Number of latest questions serialized')
+        parser.add_argument('--repeat', type=int, default=5, help='Number of timed runs, the best one is reported')
+        parser.add_argument('--user', help='Username of the requesting user, already_liked is computed for them')
+
+    def handle(self, *args, **options):
+        request = Request(APIRequestFactory().get('/', {'expand': 'answers,comments'}))
+        if options['user']:
+            try:
+                request.user = Account.objects.get(username=options['user'])
+            except Account.DoesNotExist:
+                raise CommandError('There is no user %s' % options['user'])
+        context = {'request': request}
+        questions = Question.objects.order_by('-created_at')[:options['questions']]
+        pks = list(questions.values_list('id', flat=True))
+        answers = Answer.objects.filter(question_id__in=pks)
+        cases = (
+            ('questions', len(pks),
+             lambda: QuestionSerializer(
+                 Question.objects.filter(pk__in=pks).select_related('author').prefetch_related(
+                     'tags', 'comments__author', 'answers__author', 'answers__comments__author'),
+                 many=True, context=context).data,
+             lambda: QuestionReadSerializer(Question.objects.filter(pk__in=pks), many=True, context=context).data),
+            ('answers', answers.count(),
+             lambda: AnswerSerializer(
+                 answers.select_related('author').prefetch_related('comments__author'),
+                 many=True, context=context).data,
+             lambda: AnswerReadSerializer(answers, many=True, context=context).data),
+        )
+        renderer = JSONRenderer()
+        for name, count, serialize, read in cases:
+            if renderer.render(serialize()) != renderer.render(read()):
+                raise CommandError('The %s payloads differ' % name)
+            model_time = min(timeit.repeat(serialize, number=1, repeat=options['repeat']))
+            read_time = min(timeit.repeat(read, number=1, repeat=options['repeat']))
+            self.stdout.write('%s (%d): model serializers %.1f ms, read serializers %.1f ms, %.1fx faster' % (
+                name, count, model_time * 1000, read_time * 1000, model_time / read_time if read_time else 0))
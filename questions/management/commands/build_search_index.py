@@ -0,0 +1,17 @@
+from multiprocessing import cpu_count
+from django.core.management.base import BaseCommand
+from questions.search import build_index
+
+
+class Command(BaseCommand):
+    help = 'Builds the full-text search index of all questions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=cpu_count(),
+                            help='Number of processes analyzing question texts')
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help='Number of questions handed to a worker at once')
+
+    def handle(self, *args, **options):
+        indexed = build_index(workers=options['workers'], chunk_size=options['chunk_size'])
+        self.stdout.write('%d questions have been indexed.' % indexed)
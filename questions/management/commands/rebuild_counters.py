@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from questions.counters import rebuild_counters
+from questions.ranking import rebuild_scores
+
+
+class Command(BaseCommand):
+    help = 'Recomputes answers, comments and likes counters and ranking scores of questions'
+
+    def handle(self, *args, **options):
+        rebuild_counters()
+        rebuild_scores(force=True)
+        self.stdout.write('Counters have been rebuilt.')
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from questions.similarity import rebuild_similar
+
+
+class Command(BaseCommand):
+    help = 'Recomputes similar questions of all questions from the tag index (run rebuild_tag_index first if it is stale)'
+
+    def handle(self, *args, **options):
+        rebuild_similar()
+        self.stdout.write('Similar questions have been rebuilt.')
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from questions.tag_index import rebuild_tag_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds per tag question lists and question counts of tags'
+
+    def handle(self, *args, **options):
+        rebuild_tag_index()
+        self.stdout.write('Tag index has been rebuilt.')
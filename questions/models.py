@@ -18,78 +18,242 @@ class TimeStampMixin(models.Model):
         abstract = True
 
 
+class DenormalizedFieldsMixin(models.Model):
+    """
+    Mixin for models carrying columns that are maintained elsewhere
+    (signal handlers issuing F() updates). A plain save() of an already
+    stored instance leaves those columns out of the UPDATE, so a stale
+    in-memory copy never overwrites them.
+    """
+    denormalized_fields = ()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.denormalized_fields
+            ]
+        super(DenormalizedFieldsMixin, self).save(*args, **kwargs)
+
+
+class ContentObjectCacheMixin(models.Model):
+    """
+    GenericForeignKey turns a content_object constructor argument into
+    content_type/object_id and drops the object itself. Keep it cached,
+    so it is not fetched again and counter changes are mirrored on it.
+    """
+
+    class Meta:
+        abstract = True
+
+    def __init__(self, *args, **kwargs):
+        content_object = kwargs.get('content_object')
+        super(ContentObjectCacheMixin, self).__init__(*args, **kwargs)
+        if content_object is not None:
+            setattr(self, type(self).content_object.cache_attr, content_object)
+
+
 # ================================================
 # =================== Models =====================
 # ================================================
 
 
-class Tag(models.Model):
+class Tag(DenormalizedFieldsMixin, models.Model):
     name = models.CharField(max_length=150)
+    questions_count = models.PositiveIntegerField(default=0, editable=False)
+
+    denormalized_fields = ('questions_count',)
 
     def __str__(self):
         return self.name
 
 
-class Question(TimeStampMixin):
+class Question(DenormalizedFieldsMixin, TimeStampMixin):
     summary = models.CharField(max_length=250)
     content = models.TextField()
     author = models.ForeignKey(Account, related_name='own_questions', blank=True, null=True)
     tags = models.ManyToManyField(Tag, related_name='questions')
     comments = GenericRelation('Comment')
     likes = GenericRelation('Like')
+    answers_count = models.PositiveIntegerField(default=0, editable=False)
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+    likes_count = models.PositiveIntegerField(default=0, editable=False)
+    score = models.FloatField(default=0, editable=False, db_index=True)
+    version = models.PositiveIntegerField(default=0, editable=False)
 
-    @property
-    def comments_count(self):
-        return self.comments.count()
+    denormalized_fields = ('answers_count', 'comments_count', 'likes_count', 'score', 'version')
 
-    @property
-    def likes_count(self):
-        return self.likes.count()
-
-    @property
-    def answers_count(self):
-        return self.answers.count()
+    class Meta:
+        index_together = [
+            ['answers_count', 'created_at'],
+        ]
 
     def __str__(self):
         return self.summary
 
 
-class Answer(TimeStampMixin):
+class Answer(DenormalizedFieldsMixin, TimeStampMixin):
     content = models.CharField(max_length=1000)
     question = models.ForeignKey(Question, related_name='answers')
     author = models.ForeignKey(Account, related_name='own_answers', blank=True, null=True)
     comments = GenericRelation('Comment')
     likes = GenericRelation('Like')
     solution = models.BooleanField(default=False)
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+    likes_count = models.PositiveIntegerField(default=0, editable=False)
 
-    @property
-    def comments_count(self):
-        return self.comments.count()
-
-    @property
-    def likes_count(self):
-        return self.likes.count()
+    denormalized_fields = ('comments_count', 'likes_count')
 
     def __str__(self):
         return self.content[:30]
 
 
-class Comment(TimeStampMixin):
+class Comment(ContentObjectCacheMixin, TimeStampMixin):
     content = models.CharField(max_length=400)
     author = models.ForeignKey(Account, related_name='comments')
     content_type = models.ForeignKey(ContentType)
     object_id = models.PositiveIntegerField()
     content_object = GenericForeignKey('content_type', 'object_id')
 
+    class Meta:
+        index_together = [
+            ['content_type', 'object_id', 'created_at'],
+            ['author', 'created_at'],
+        ]
+
     def __str__(self):
         return self.content[:30]
 
 
-class Like(TimeStampMixin):
+class Like(ContentObjectCacheMixin, TimeStampMixin):
     author = models.ForeignKey(Account, related_name='likes')
     content_type = models.ForeignKey(ContentType)
     object_id = models.PositiveIntegerField()
     content_object = GenericForeignKey('content_type', 'object_id')
 
+    class Meta:
+        unique_together = ('author', 'content_type', 'object_id')
+
     def __str__(self):
         return '%s: %s' % (self.author.username, self.created_at)
+
+
+class LikeEvent(models.Model):
+    """
+    Append-only log of likes and unlikes of hot objects. Writes land here
+    without touching the Like table or the counters of the liked object,
+    and are periodically compacted into both.
+    """
+    author = models.ForeignKey(Account, related_name='+')
+    content_type = models.ForeignKey(ContentType, related_name='+')
+    object_id = models.PositiveIntegerField()
+    liked = models.BooleanField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        index_together = ('author', 'content_type', 'object_id')
+
+    def __str__(self):
+        return '%s %s %s:%s' % (self.author_id, 'likes' if self.liked else 'unlikes',
+                                self.content_type_id, self.object_id)
+
+
+class TaggedQuestion(models.Model):
+    """
+    Materialized tag feed entry. Duplicates the sort keys of the question,
+    so a tag feed is read from the (tag, created_at) or (tag, score) index.
+    """
+    tag = models.ForeignKey(Tag, related_name='question_entries')
+    question = models.ForeignKey(Question, related_name='tag_entries')
+    created_at = models.DateTimeField()
+    score = models.FloatField(default=0)
+
+    class Meta:
+        unique_together = ('tag', 'question')
+        index_together = [
+            ['tag', 'created_at'],
+            ['tag', 'score'],
+        ]
+
+    def __str__(self):
+        return '%s: %s' % (self.tag_id, self.question_id)
+
+
+class SimilarQuestion(models.Model):
+    """
+    One of the precomputed nearest neighbours of a question by tags.
+    """
+    question = models.ForeignKey(Question, related_name='similar_entries')
+    similar = models.ForeignKey(Question, related_name='+')
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = ('question', 'similar')
+
+    def __str__(self):
+        return '%s ~ %s: %s' % (self.question_id, self.similar_id, self.score)
+
+
+# ================================================
+# ================ Search index ==================
+# ================================================
+
+
+class SearchDocument(models.Model):
+    question = models.OneToOneField(Question, primary_key=True, related_name='search_document')
+    length = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return '%s: %s terms' % (self.question_id, self.length)
+
+
+class SearchPosting(models.Model):
+    term = models.CharField(max_length=50)
+    document = models.ForeignKey(SearchDocument, related_name='postings')
+    frequency = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('term', 'document')
+
+    def __str__(self):
+        return '%s: %s' % (self.term, self.document_id)
+
+
+# ================================================
+# ================= Change log ===================
+# ================================================
+
+
+class QuestionChange(models.Model):
+    """
+    Entry of the change log of a question read by delta-syncing clients:
+    an answer or comment was saved or deleted, or the likes of the question
+    or of one of its answers changed. The question is referenced by id only,
+    so entries can be written while the question itself is being deleted.
+    Entries older than QUESTIONS_CHANGES_RETENTION days are pruned.
+    """
+    ANSWER = 'answer'
+    COMMENT = 'comment'
+    QUESTION_LIKES = 'question_likes'
+    ANSWER_LIKES = 'answer_likes'
+    KIND_CHOICES = (
+        (ANSWER, 'Answer'),
+        (COMMENT, 'Comment'),
+        (QUESTION_LIKES, 'Question likes'),
+        (ANSWER_LIKES, 'Answer likes'),
+    )
+
+    question_id = models.PositiveIntegerField()
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+    deleted = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        index_together = ('question_id', 'id')
+
+    def __str__(self):
+        return '%s: %s %s%s' % (self.question_id, self.kind, self.object_id, ' deleted' if self.deleted else '')
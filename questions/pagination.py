@@ -0,0 +1,175 @@
+import json
+import base64
+import binascii
+from datetime import datetime
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+class KeysetPage(object):
+    """
+    Page of a keyset paginator. Besides the objects it holds the cursors
+    of a few neighbour pages, which makes up the pager window.
+    """
+
+    def __init__(self, object_list, number, window):
+        self.object_list = object_list
+        self.number = number
+        self.window = window
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_previous(self):
+        return any(number < self.number for number, cursor in self.window)
+
+    def has_next(self):
+        return any(number > self.number for number, cursor in self.window)
+
+
+class KeysetPaginator(object):
+    """
+    Paginates a queryset by filtering on the ordering key of the first or
+    last object of the neighbour page instead of using OFFSET, so any page
+    costs the same as the first one. The ordering has to be unique, so it
+    should end with the primary key.
+
+    Every page is loaded with at most three bounded queries: the page itself
+    and look-ahead/look-behind queries used to build the pager window.
+    """
+
+    def __init__(self, queryset, per_page, ordering, window=2):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = ordering
+        self.window = window
+        self.keys = [field.lstrip('-') for field in ordering]
+        self.reversed_ordering = [field[1:] if field.startswith('-') else '-' + field for field in ordering]
+
+    # ============ cursors ============
+
+    def _field(self, name):
+        try:
+            return self.queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+
+    def encode_cursor(self, obj, direction, number):
+        values = []
+        for key in self.keys:
+            value = getattr(obj, key)
+            values.append(value.isoformat() if isinstance(value, datetime) else value)
+        data = json.dumps([direction, number, values]).encode('utf-8')
+        return base64.urlsafe_b64encode(data).decode('ascii')
+
+    def decode_cursor(self, cursor):
+        """
+        Return (direction, number, key values) of a cursor or raise ValueError.
+        """
+        try:
+            direction, number, values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+        except (TypeError, ValueError, binascii.Error, UnicodeError):
+            raise ValueError('Invalid cursor')
+        if direction not in ('after', 'before') or not isinstance(number, int) or len(values) != len(self.keys):
+            raise ValueError('Invalid cursor')
+        decoded = []
+        for key, value in zip(self.keys, values):
+            field = self._field(key)
+            try:
+                decoded.append(field.to_python(value) if field is not None else value)
+            except ValidationError:
+                raise ValueError('Invalid cursor')
+        return direction, number, decoded
+
+    # ============ querying ============
+
+    def _seek(self, values, direction):
+        """
+        Filter selecting the rows placed after (or before) the given key
+        in the paginator ordering.
+        """
+        condition = Q()
+        for position, field in enumerate(self.ordering):
+            descending = field.startswith('-')
+            if direction == 'before':
+                descending = not descending
+            lookup = '%s__%s' % (self.keys[position], 'lt' if descending else 'gt')
+            step = Q(**{lookup: values[position]})
+            for key, value in zip(self.keys[:position], values[:position]):
+                step &= Q(**{key: value})
+            condition |= step
+        return condition
+
+    def _fetch(self, values, direction, limit):
+        ordering = self.ordering if direction == 'after' else self.reversed_ordering
+        queryset = self.queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, direction))
+        return list(queryset[:limit])
+
+    def _key(self, obj):
+        return [getattr(obj, key) for key in self.keys]
+
+    def page(self, cursor=None):
+        direction, number, values = 'after', 1, None
+        if cursor:
+            try:
+                direction, number, values = self.decode_cursor(cursor)
+            except ValueError:
+                pass
+        items = self._fetch(values, direction, self.per_page)
+        if direction == 'before':
+            if len(items) < self.per_page:
+                return self.page()
+            items.reverse()
+        if values is None:
+            number = 1
+
+        window = []
+        if items and values is not None:
+            behind = self._fetch(self._key(items[0]), 'before', self.per_page * (self.window - 1) + 1)
+            for step in range(1, self.window + 1):
+                if number - step < 1 or len(behind) <= self.per_page * (step - 1):
+                    break
+                if number - step == 1:
+                    window.insert(0, (1, None))
+                    break
+                anchor = items[0] if step == 1 else behind[self.per_page * (step - 1) - 1]
+                window.insert(0, (number - step, self.encode_cursor(anchor, 'before', number - step)))
+        window.append((number, cursor))
+        if items:
+            ahead = self._fetch(self._key(items[-1]), 'after', self.per_page * (self.window - 1) + 1)
+            for step in range(1, self.window + 1):
+                if len(ahead) <= self.per_page * (step - 1):
+                    break
+                anchor = items[-1] if step == 1 else ahead[self.per_page * (step - 1) - 1]
+                window.append((number + step, self.encode_cursor(anchor, 'after', number + step)))
+        return KeysetPage(items, number, window)
+
+
+class LinkHeaderCursorPagination(CursorPagination):
+    """
+    DRF cursor pagination which keeps the response body a plain list and
+    advertises the neighbour pages in the Link header instead.
+    """
+    ordering = '-created_at'
+    page_size = 20
+
+    def get_paginated_response(self, data):
+        links = []
+        for rel, url in (('next', self.get_next_link()), ('prev', self.get_previous_link())):
+            if url:
+                links.append('<%s>; rel="%s"' % (url, rel))
+        return Response(data, headers={'Link': ', '.join(links)} if links else None)
+
+
+class CommentsCursorPagination(LinkHeaderCursorPagination):
+    """
+    Comment threads read oldest first.
+    """
+    ordering = 'created_at'
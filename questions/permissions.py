@@ -1,4 +1,13 @@
 from rest_framework import permissions
+from tost.identity import get_identity_map
+
+
+def is_owner(user, obj):
+    """
+    Tell whether the user is the author of a question, an answer or
+    a comment. Only the author ids are compared, the author is not loaded.
+    """
+    return obj.author_id is not None and obj.author_id == user.pk
 
 
 class IsAuthenticatedOrNotAllowed(permissions.BasePermission):
@@ -14,7 +23,7 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method in permissions.SAFE_METHODS:
             return True
-        return request.user == obj.author
+        return is_owner(request.user, obj)
 
 
 class IsOwnerOrQOwnerOrReadOnly(permissions.BasePermission):
@@ -22,4 +31,7 @@ class IsOwnerOrQOwnerOrReadOnly(permissions.BasePermission):
 	def has_object_permission(self, request, view, obj):
 		if request.method in permissions.SAFE_METHODS:
 			return True
-		return request.user == obj.author or request.user == obj.question.author
+		if is_owner(request.user, obj):
+			return True
+		get_identity_map(request).attach([obj], 'question')
+		return is_owner(request.user, obj.question)
@@ -0,0 +1,149 @@
+import logging
+import socket
+import threading
+import uuid
+from collections import defaultdict, deque
+from django.conf import settings
+from django.utils.module_loading import import_string
+from django.utils.six.moves import queue
+from kombu import Connection, Exchange, Queue
+from kombu.pools import producers
+
+
+# Hubs fan published messages out to every subscription of a channel.
+# A subscription is read with get(timeout), which returns the next message
+# or None once the timeout expires, and released with close().
+
+
+class InProcessHub(object):
+    """
+    Hub living in the memory of a single process, every subscription is
+    a queue the published messages are put in. Used by the development
+    server and the tests as a stand-in for the broker.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscriptions = defaultdict(set)
+
+    def publish(self, channel, message):
+        with self.lock:
+            subscriptions = list(self.subscriptions[channel])
+        for subscription in subscriptions:
+            subscription.messages.put(message)
+
+    def subscribe(self, channel):
+        subscription = InProcessSubscription(self, channel)
+        with self.lock:
+            self.subscriptions[channel].add(subscription)
+        return subscription
+
+
+class InProcessSubscription(object):
+
+    def __init__(self, hub, channel):
+        self.hub = hub
+        self.channel = channel
+        self.messages = queue.Queue()
+
+    def get(self, timeout):
+        try:
+            return self.messages.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        with self.hub.lock:
+            self.hub.subscriptions[self.channel].discard(self)
+
+
+class KombuHub(object):
+    """
+    Hub publishing through a direct exchange of the Celery broker, so it
+    reaches the subscriptions of all the processes. Every subscription
+    consumes its own exclusive queue bound to the channel.
+    """
+
+    def __init__(self, url=None):
+        self.url = url or getattr(settings, 'BROKER_URL', None)
+        self.exchange = Exchange('questions.push', type='direct', durable=False)
+
+    def publish(self, channel, message):
+        with producers[Connection(self.url)].acquire(block=True) as producer:
+            producer.publish(
+                message,
+                exchange=self.exchange,
+                routing_key=channel,
+                declare=[self.exchange],
+                serializer='json',
+                delivery_mode=1,
+            )
+
+    def subscribe(self, channel):
+        return KombuSubscription(self, channel)
+
+
+class KombuSubscription(object):
+
+    def __init__(self, hub, channel):
+        self.connection = Connection(hub.url)
+        self.messages = deque()
+        subscription_queue = Queue(
+            'questions.push.%s' % uuid.uuid4().hex,
+            exchange=hub.exchange,
+            routing_key=channel,
+            durable=False,
+            exclusive=True,
+            auto_delete=True,
+        )
+        self.consumer = self.connection.Consumer(subscription_queue, callbacks=[self.receive], accept=['json'])
+        self.consumer.consume()
+
+    def receive(self, body, message):
+        self.messages.append(body)
+        message.ack()
+
+    def get(self, timeout):
+        if not self.messages:
+            try:
+                self.connection.drain_events(timeout=timeout)
+            except socket.timeout:
+                return None
+        return self.messages.popleft() if self.messages else None
+
+    def close(self):
+        try:
+            self.consumer.cancel()
+        finally:
+            self.connection.release()
+
+
+logger = logging.getLogger(__name__)
+
+_hubs = {}
+
+
+def get_hub():
+    """
+    Return the hub configured by QUESTIONS_PUSH_HUB, one per process.
+    """
+    path = getattr(settings, 'QUESTIONS_PUSH_HUB', 'questions.push.InProcessHub')
+    if path not in _hubs:
+        _hubs[path] = import_string(path)()
+    return _hubs[path]
+
+
+def question_channel(question_id):
+    return 'question-%s' % question_id
+
+
+def publish_change(question_id, change_id):
+    """
+    Tell the subscribers of a question that its change log has grown up
+    to change_id. Subscribers read the log itself, so a publish that
+    happens before the change is committed, or is lost, only delays them.
+    """
+    try:
+        get_hub().publish(question_channel(question_id), change_id)
+    except Exception:
+        logger.exception('Could not publish change %s of question %s', change_id, question_id)
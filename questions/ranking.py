@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, When, Value, FloatField
+from django.utils import timezone
+from .models import Question, TaggedQuestion
+
+
+BULK_UPDATE_CHUNK = 500
+
+
+def compute_score(likes_count, created_at, now=None):
+    """
+    Ranking score of a question. With zero QUESTIONS_SCORE_GRAVITY it is
+    just the number of likes, otherwise likes are divided by the age of
+    the question in hours raised to the gravity power (time decay).
+    """
+    gravity = getattr(settings, 'QUESTIONS_SCORE_GRAVITY', 0)
+    if not gravity:
+        return float(likes_count)
+    now = now or timezone.now()
+    age_hours = max((now - created_at).total_seconds(), 0) / 3600.0
+    return likes_count / (age_hours + 2) ** gravity
+
+
+def refresh_score(pk, instance=None):
+    """
+    Recompute the stored score of a single question, mirroring it on
+    the in-memory instance if given.
+    """
+    row = Question.objects.filter(pk=pk).values_list('likes_count', 'created_at').first()
+    if row is None:
+        return
+    score = compute_score(*row)
+    Question.objects.filter(pk=pk).update(score=score)
+    TaggedQuestion.objects.filter(question_id=pk).update(score=score)
+    if isinstance(instance, Question) and instance.pk == pk:
+        instance.score = score
+
+
+def _update_scores(scores):
+    Question.objects.filter(pk__in=scores.keys()).update(score=Case(
+        *[When(pk=pk, then=Value(score)) for pk, score in scores.items()],
+        output_field=FloatField()
+    ))
+    TaggedQuestion.objects.filter(question_id__in=scores.keys()).update(score=Case(
+        *[When(question_id=pk, then=Value(score)) for pk, score in scores.items()],
+        output_field=FloatField()
+    ))
+
+
+def rebuild_scores(force=False):
+    """
+    Recompute the scores of all questions, one UPDATE per chunk of rows.
+    With zero gravity the scores follow the likes as they change, so
+    nothing is done unless forced, e.g. after counters were fixed.
+    """
+    if not force and not getattr(settings, 'QUESTIONS_SCORE_GRAVITY', 0):
+        return
+    now = timezone.now()
+    scores = {}
+    with transaction.atomic():
+        for pk, likes_count, created_at in Question.objects.values_list('id', 'likes_count', 'created_at').iterator():
+            scores[pk] = compute_score(likes_count, created_at, now)
+            if len(scores) >= BULK_UPDATE_CHUNK:
+                _update_scores(scores)
+                scores = {}
+        if scores:
+            _update_scores(scores)
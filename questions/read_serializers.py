@@ -0,0 +1,346 @@
+from collections import OrderedDict, defaultdict
+from functools import reduce
+from operator import or_
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Model, Q
+from django.db.models.query import QuerySet
+from account.models import Account
+from .models import Question, Answer, Comment, QuestionChange
+from .serializers import SparseFieldsMixin, liked_keys
+from .changes import oldest_cursor, latest_cursor
+
+
+# Read-only counterparts of the serializers in serializers.py producing
+# the same output from .values() rows. Which fields are rendered and how
+# is worked out once per serializer (its plan), and every kind of related
+# rows is loaded with a single query per payload.
+
+
+def column(name):
+    return lambda row, payload: row[name]
+
+
+class Payload(object):
+    """
+    Related rows of a payload, filled in by the read serializers.
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self.user = request.user
+        self.question_type_id = ContentType.objects.get_for_model(Question).id
+        self.answer_type_id = ContentType.objects.get_for_model(Answer).id
+        self.authors = {}
+        self.rendered_authors = {}
+        self.tags = defaultdict(list)
+        self.answers = defaultdict(list)
+        self.comments = defaultdict(list)
+        self.liked = set()
+
+    def is_my(self, row):
+        return row['author_id'] is not None and row['author_id'] == self.user.pk
+
+    def load_tags(self, question_ids):
+        rows = (
+            Question.tags.through.objects.filter(question_id__in=question_ids)
+            .order_by('tag_id').values_list('question_id', 'tag_id', 'tag__name')
+        )
+        for question_id, tag_id, name in rows:
+            self.tags[question_id].append(OrderedDict((('id', tag_id), ('name', name))))
+
+    def load_answers(self, question_ids):
+        rows = Answer.objects.filter(question_id__in=question_ids).order_by('pk').values(*AnswerReadSerializer.columns)
+        for row in rows:
+            self.answers[row['question_id']].append(row)
+
+    def load_comments(self, question_ids, answer_ids):
+        conditions = []
+        if question_ids:
+            conditions.append(Q(content_type_id=self.question_type_id, object_id__in=question_ids))
+        if answer_ids:
+            conditions.append(Q(content_type_id=self.answer_type_id, object_id__in=answer_ids))
+        if not conditions:
+            return []
+        rows = list(Comment.objects.filter(reduce(or_, conditions)).order_by('pk').values(*CommentReadSerializer.columns))
+        for row in rows:
+            self.comments[row['content_type_id'], row['object_id']].append(row)
+        return rows
+
+    def load_authors(self, author_ids):
+        author_ids = set(author_ids) - set([None])
+        if author_ids:
+            rows = Account.objects.filter(pk__in=author_ids).values(*AccountReadSerializer.columns)
+            self.authors.update((row['id'], row) for row in rows)
+
+    def load_liked(self, question_ids, answer_ids):
+        if not self.user.is_authenticated():
+            return
+        condition = Q(content_type_id=self.answer_type_id, object_id__in=answer_ids)
+        if question_ids:
+            condition |= Q(content_type_id=self.question_type_id, object_id__in=question_ids)
+        self.liked = liked_keys(self.user, condition)
+
+
+class ReadSerializer(object):
+    """
+    Base of the read serializers. `fields` lists the output keys in order,
+    `columns` the .values() columns they are read from. A field is copied
+    from the column of the same name unless there is a read_<field>(row,
+    payload) method.
+    """
+    model = None
+    fields = ()
+    columns = ()
+
+    def __init__(self, instance=None, context=None, many=False):
+        self.instance = instance
+        self.context = context or {}
+        self.many = many
+        self.plan = [(name, getattr(self, 'read_%s' % name, None) or column(name)) for name in self.get_fields()]
+
+    def get_fields(self):
+        return self.fields
+
+    def render(self, row, payload):
+        return OrderedDict((name, read(row, payload)) for name, read in self.plan)
+
+    def get_rows(self):
+        """
+        Rows of the instance, which can be a queryset, a model instance
+        or a list of them.
+        """
+        if isinstance(self.instance, QuerySet):
+            return list(self.instance.values(*self.columns))
+        objects = self.instance if self.many else [self.instance]
+        pks = [obj.pk if isinstance(obj, Model) else obj for obj in objects]
+        rows = dict((row['id'], row) for row in self.model.objects.filter(pk__in=pks).values(*self.columns))
+        return [rows[pk] for pk in pks if pk in rows]
+
+    def load(self, rows, payload):
+        pass
+
+    @property
+    def data(self):
+        if self.instance is None:
+            return [] if self.many else None
+        payload = Payload(self.context['request'])
+        rows = self.get_rows()
+        if rows:
+            self.load(rows, payload)
+        data = [self.render(row, payload) for row in rows]
+        if self.many:
+            return data
+        return data[0] if data else None
+
+
+class AccountReadSerializer(ReadSerializer):
+    model = Account
+    fields = ('id', 'username', 'email', 'tagline', 'description', 'photo')
+    columns = fields
+
+    def __init__(self, *args, **kwargs):
+        super(AccountReadSerializer, self).__init__(*args, **kwargs)
+        self.storage = Account._meta.get_field('photo').storage
+
+    def read_photo(self, row, payload):
+        if not row['photo']:
+            return None
+        return payload.request.build_absolute_uri(self.storage.url(row['photo']))
+
+    def render_author(self, author_id, payload):
+        """
+        Rendered author of a nested object, rendered once per payload.
+        """
+        if author_id is None:
+            return None
+        if author_id not in payload.rendered_authors:
+            payload.rendered_authors[author_id] = self.render(payload.authors[author_id], payload)
+        return payload.rendered_authors[author_id]
+
+
+class CommentReadSerializer(ReadSerializer):
+    model = Comment
+    fields = ('id', 'content', 'author', 'content_object', 'my')
+    columns = ('id', 'content', 'author_id', 'content_type_id', 'object_id')
+
+    def __init__(self, *args, **kwargs):
+        super(CommentReadSerializer, self).__init__(*args, **kwargs)
+        self.authors = AccountReadSerializer()
+
+    def read_author(self, row, payload):
+        return self.authors.render_author(row['author_id'], payload)
+
+    def read_content_object(self, row, payload):
+        if row['content_type_id'] == payload.question_type_id:
+            return 'Question: %s' % row['object_id']
+        if row['content_type_id'] == payload.answer_type_id:
+            return 'Answer: %s' % row['object_id']
+        raise Exception('Unexpected type of tagged object')
+
+    def read_my(self, row, payload):
+        return payload.is_my(row)
+
+    def load(self, rows, payload):
+        payload.load_authors(row['author_id'] for row in rows)
+
+
+class AnswerReadSerializer(ReadSerializer):
+    model = Answer
+    fields = ('id', 'content', 'author', 'comments', 'likes_count', 'already_liked', 'my', 'solution')
+    columns = ('id', 'question_id', 'content', 'author_id', 'likes_count', 'solution')
+
+    def __init__(self, *args, **kwargs):
+        super(AnswerReadSerializer, self).__init__(*args, **kwargs)
+        self.authors = AccountReadSerializer()
+        self.comments = CommentReadSerializer()
+
+    def read_author(self, row, payload):
+        return self.authors.render_author(row['author_id'], payload)
+
+    def read_comments(self, row, payload):
+        return [self.comments.render(comment, payload)
+                for comment in payload.comments[payload.answer_type_id, row['id']]]
+
+    def read_already_liked(self, row, payload):
+        return (payload.answer_type_id, row['id']) in payload.liked
+
+    def read_my(self, row, payload):
+        return payload.is_my(row)
+
+    def load(self, rows, payload):
+        answer_ids = [row['id'] for row in rows]
+        comments = payload.load_comments([], answer_ids)
+        payload.load_authors([row['author_id'] for row in rows] + [row['author_id'] for row in comments])
+        payload.load_liked([], answer_ids)
+
+
+class QuestionReadSerializer(ReadSerializer):
+    """
+    Honours the `fields` and `expand` query parameters the same way as
+    QuestionSerializer does.
+    """
+    model = Question
+    fields = ('id', 'summary', 'content', 'tags', 'author', 'answers', 'comments',
+              'likes_count', 'already_liked', 'my')
+    expandable_fields = ('answers', 'comments')
+    columns = ('id', 'summary', 'content', 'author_id', 'likes_count')
+
+    def __init__(self, *args, **kwargs):
+        self.expand_all = kwargs.pop('expand_all', False)
+        super(QuestionReadSerializer, self).__init__(*args, **kwargs)
+        self.authors = AccountReadSerializer()
+        self.answers = AnswerReadSerializer()
+        self.comments = CommentReadSerializer()
+
+    def get_fields(self):
+        request = self.context.get('request')
+        fields = SparseFieldsMixin.parse_field_list(request, 'fields')
+        expand = SparseFieldsMixin.parse_field_list(request, 'expand')
+        return [
+            name for name in self.fields
+            if (self.expand_all or name in expand or name not in self.expandable_fields)
+            and (not fields or name in fields or name in expand)
+        ]
+
+    def read_tags(self, row, payload):
+        return payload.tags[row['id']]
+
+    def read_author(self, row, payload):
+        return self.authors.render_author(row['author_id'], payload)
+
+    def read_answers(self, row, payload):
+        return [self.answers.render(answer, payload) for answer in payload.answers[row['id']]]
+
+    def read_comments(self, row, payload):
+        return [self.comments.render(comment, payload)
+                for comment in payload.comments[payload.question_type_id, row['id']]]
+
+    def read_already_liked(self, row, payload):
+        return (payload.question_type_id, row['id']) in payload.liked
+
+    def read_my(self, row, payload):
+        return payload.is_my(row)
+
+    def load(self, rows, payload):
+        fields = set(name for name, read in self.plan)
+        question_ids = [row['id'] for row in rows]
+        author_ids = [row['author_id'] for row in rows]
+        answer_ids = []
+        if 'tags' in fields:
+            payload.load_tags(question_ids)
+        if 'answers' in fields:
+            payload.load_answers(question_ids)
+            answers = [answer for question_id in question_ids for answer in payload.answers[question_id]]
+            answer_ids = [answer['id'] for answer in answers]
+            author_ids += [answer['author_id'] for answer in answers]
+        comments = payload.load_comments(question_ids if 'comments' in fields else [], answer_ids)
+        author_ids += [comment['author_id'] for comment in comments]
+        payload.load_authors(author_ids)
+        if 'already_liked' in fields or 'answers' in fields:
+            payload.load_liked(question_ids if 'already_liked' in fields else [], answer_ids)
+
+
+def _read_likes(request, model, pks):
+    content_type = ContentType.objects.get_for_model(model)
+    liked = set()
+    if request.user.is_authenticated() and pks:
+        liked = liked_keys(request.user, Q(content_type=content_type, object_id__in=pks))
+    return [
+        OrderedDict((
+            ('content_object', '%s: %s' % (model.__name__, pk)),
+            ('likes_count', likes_count),
+            ('already_liked', (content_type.id, pk) in liked),
+        ))
+        for pk, likes_count in model.objects.filter(pk__in=pks).order_by('pk').values_list('id', 'likes_count')
+    ]
+
+
+def read_changes(request, question_id, since):
+    """
+    Return the changes of a question since the cursor: the current state
+    of the answers and comments saved since then, the like counters that
+    have changed, and tombstones of the deleted answers and comments.
+    Several changes of one object are folded into its latest state.
+    A cursor older than the pruned part of the log only gets a fresh
+    cursor with `resync`: the client has to reload the question.
+    """
+    if since < oldest_cursor():
+        return OrderedDict((
+            ('cursor', str(latest_cursor(question_id))),
+            ('resync', True),
+        ))
+    entries = (
+        QuestionChange.objects.filter(question_id=question_id, id__gt=since)
+        .order_by('id').values_list('id', 'kind', 'object_id', 'deleted')
+    )
+    cursor = since
+    latest = OrderedDict()
+    for pk, kind, object_id, deleted in entries:
+        cursor = pk
+        latest[kind, object_id] = deleted
+
+    def changed(kind, deleted=False):
+        return [object_id for (entry_kind, object_id), is_deleted in latest.items()
+                if entry_kind == kind and is_deleted == deleted]
+
+    context = {'request': request}
+    answers = AnswerReadSerializer(
+        Answer.objects.filter(question_id=question_id, pk__in=changed(QuestionChange.ANSWER)).order_by('pk'),
+        many=True, context=context
+    ).data
+    comments = CommentReadSerializer(
+        Comment.objects.filter(pk__in=changed(QuestionChange.COMMENT)).order_by('pk'), many=True, context=context
+    ).data
+    likes = (_read_likes(request, Question, changed(QuestionChange.QUESTION_LIKES)) +
+             _read_likes(request, Answer, changed(QuestionChange.ANSWER_LIKES)))
+    deleted = (
+        [OrderedDict((('type', 'answer'), ('id', pk))) for pk in changed(QuestionChange.ANSWER, True)] +
+        [OrderedDict((('type', 'comment'), ('id', pk))) for pk in changed(QuestionChange.COMMENT, True)]
+    )
+    return OrderedDict((
+        ('cursor', str(cursor)),
+        ('answers', answers),
+        ('comments', comments),
+        ('likes', likes),
+        ('deleted', deleted),
+    ))
@@ -0,0 +1,301 @@
+import re
+import time
+import hashlib
+import heapq
+import math
+from collections import Counter, defaultdict, deque
+from multiprocessing import Pool
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Avg, Count, Case, When, Value, IntegerField
+from .models import Question, SearchDocument, SearchPosting
+
+
+# ================================================
+# ================== Analysis ====================
+# ================================================
+
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+STEMMABLE_RE = re.compile(r'^[a-z]+$')
+
+STOP_WORDS = frozenset((
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'for', 'if', 'in',
+    'into', 'is', 'it', 'no', 'not', 'of', 'on', 'or', 'such', 'that', 'the',
+    'their', 'then', 'there', 'these', 'they', 'this', 'to', 'was', 'will', 'with',
+))
+
+# Checked in order, the first matching suffix wins.
+STEM_RULES = (
+    ('ational', 'ate'),
+    ('tional', 'tion'),
+    ('ization', 'ize'),
+    ('iveness', 'ive'),
+    ('fulness', 'ful'),
+    ('ousness', 'ous'),
+    ('ations', 'ate'),
+    ('ation', 'ate'),
+    ('ingly', ''),
+    ('edly', ''),
+    ('ments', ''),
+    ('ment', ''),
+    ('ness', ''),
+    ('sses', 'ss'),
+    ('ies', 'y'),
+    ('ing', ''),
+    ('ed', ''),
+    ('ly', ''),
+    ('ss', 'ss'),
+    ('us', 'us'),
+    ('is', 'is'),
+    ('s', ''),
+)
+
+UNDOUBLE_SUFFIXES = frozenset(('ingly', 'edly', 'ing', 'ed'))
+
+MIN_STEM_LENGTH = 3
+
+MAX_TERM_LENGTH = 50
+
+# Terms of the summary count this many times, as it states the issue.
+SUMMARY_WEIGHT = 2
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall(text.lower())
+            if token not in STOP_WORDS and len(token) <= MAX_TERM_LENGTH]
+
+
+def stem(word):
+    """
+    Light suffix-stripping stemmer for english words. Words in other
+    alphabets and short words are returned as is.
+    """
+    if len(word) <= MIN_STEM_LENGTH or not STEMMABLE_RE.match(word):
+        return word
+    for suffix, replacement in STEM_RULES:
+        if word.endswith(suffix):
+            base = word[:-len(suffix)]
+            if len(base) + len(replacement) < MIN_STEM_LENGTH:
+                return word
+            word = base + replacement
+            if suffix in UNDOUBLE_SUFFIXES and len(word) > MIN_STEM_LENGTH \
+                    and word[-1] == word[-2] and word[-1] not in 'aeioulsz':
+                word = word[:-1]
+            break
+    if len(word) > MIN_STEM_LENGTH + 1 and word.endswith('e'):
+        word = word[:-1]
+    return word
+
+
+def analyze(text):
+    return [stem(token) for token in tokenize(text)]
+
+
+def document_terms(summary, content):
+    terms = Counter(analyze(content))
+    for term in analyze(summary):
+        terms[term] += SUMMARY_WEIGHT
+    return terms
+
+
+def analyze_chunk(rows):
+    """
+    Turn (id, summary, content) rows into (id, terms) pairs. Runs in
+    worker processes, so it must not touch the database.
+    """
+    return [(pk, document_terms(summary, content)) for pk, summary, content in rows]
+
+
+# ================================================
+# =================== Indexing ===================
+# ================================================
+
+
+def _store(analyzed):
+    SearchDocument.objects.bulk_create([
+        SearchDocument(question_id=pk, length=sum(terms.values())) for pk, terms in analyzed
+    ])
+    SearchPosting.objects.bulk_create([
+        SearchPosting(document_id=pk, term=term, frequency=frequency)
+        for pk, terms in analyzed for term, frequency in terms.items()
+    ], batch_size=500)
+
+
+def index_question(question):
+    """
+    Replace the postings of a single question.
+    """
+    with transaction.atomic():
+        SearchDocument.objects.filter(question_id=question.pk).delete()
+        _store([(question.pk, document_terms(question.summary, question.content))])
+    expire_results()
+
+
+def _chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def build_index(workers=1, chunk_size=500):
+    """
+    Rebuild the whole index. Text analysis is spread over a pool of
+    worker processes, while the rows are read and the postings are
+    written by the calling process. Returns the number of indexed questions.
+    """
+    rows = Question.objects.values_list('id', 'summary', 'content').order_by('id').iterator()
+    indexed = 0
+    pool = Pool(workers) if workers > 1 else None
+    try:
+        with transaction.atomic():
+            SearchPosting.objects.all().delete()
+            SearchDocument.objects.all().delete()
+            pending = deque()
+            for chunk in _chunked(rows, chunk_size):
+                if pool is None:
+                    analyzed = analyze_chunk(chunk)
+                    _store(analyzed)
+                    indexed += len(analyzed)
+                    continue
+                pending.append(pool.apply_async(analyze_chunk, (chunk,)))
+                if len(pending) > workers * 2:
+                    analyzed = pending.popleft().get()
+                    _store(analyzed)
+                    indexed += len(analyzed)
+            while pending:
+                analyzed = pending.popleft().get()
+                _store(analyzed)
+                indexed += len(analyzed)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    expire_results()
+    return indexed
+
+
+# ================================================
+# =================== Ranking ====================
+# ================================================
+
+
+BM25_K1 = 1.2
+
+BM25_B = 0.75
+
+# Searches return at most this many questions, the best matches. Matches
+# beyond it are never shown, whatever page is asked for.
+RESULTS_LIMIT = 500
+
+# Seconds the ranked ids of a query are cached. Every index update also
+# moves the generation the cache keys include.
+RESULTS_TIMEOUT = 60
+
+RESULTS_GENERATION_KEY = 'search-generation'
+
+
+def _results_cache():
+    return caches[getattr(settings, 'QUESTIONS_SEARCH_CACHE', 'default')]
+
+
+def _generation(cache):
+    generation = cache.get(RESULTS_GENERATION_KEY)
+    if generation is None:
+        # Starting from the clock keeps an evicted generation from
+        # coming back with results cached under it.
+        generation = int(time.time() * 1000)
+        cache.add(RESULTS_GENERATION_KEY, generation, None)
+    return generation
+
+
+def expire_results():
+    """
+    Make the cached results of every query outdated.
+    """
+    cache = _results_cache()
+    try:
+        cache.incr(RESULTS_GENERATION_KEY)
+    except ValueError:
+        _generation(cache)
+
+
+def _postings(terms, count):
+    """
+    Postings of the query terms as (term, id, frequency, length) rows.
+    Terms found in more than QUESTIONS_SEARCH_MAX_POSTINGS documents hardly
+    change the order and are the most expensive to read, so they are skipped
+    when the query has rarer terms. Otherwise only the most frequent postings
+    of the rarest term are read.
+    """
+    cap = getattr(settings, 'QUESTIONS_SEARCH_MAX_POSTINGS', None)
+    postings = SearchPosting.objects.values_list('term', 'document_id', 'frequency', 'document__length')
+    if cap is None or count <= cap:
+        return postings.filter(term__in=terms)
+    df = dict(SearchPosting.objects.filter(term__in=terms).values('term').annotate(
+        df=Count('id')).values_list('term', 'df'))
+    rare = [term for term in df if df[term] <= cap]
+    if rare:
+        return postings.filter(term__in=rare)
+    if not df:
+        return []
+    rarest = min(df, key=lambda term: (df[term], term))
+    return postings.filter(term=rarest).order_by('-frequency', 'document_id')[:cap]
+
+
+def rank(query, limit=RESULTS_LIMIT):
+    """
+    Return ids of the questions matching any of the query terms,
+    best BM25 match first, at most limit of them. The ids are cached
+    per analyzed query until the index changes or RESULTS_TIMEOUT.
+    """
+    terms = set(analyze(query))
+    if not terms:
+        return []
+    cache = _results_cache()
+    normalized = ' '.join(sorted(terms)).encode('utf-8')
+    key = 'search:%d:%d:%s' % (_generation(cache), limit, hashlib.md5(normalized).hexdigest())
+    ids = cache.get(key)
+    if ids is None:
+        ids = _rank(terms, limit)
+        cache.set(key, ids, RESULTS_TIMEOUT)
+    return ids
+
+
+def _rank(terms, limit):
+    stats = SearchDocument.objects.aggregate(count=Count('question'), avg_length=Avg('length'))
+    if not stats['count']:
+        return []
+    postings = defaultdict(list)
+    for term, pk, frequency, length in _postings(terms, stats['count']):
+        postings[term].append((pk, frequency, length))
+    avg_length = stats['avg_length'] or 1
+    scores = defaultdict(float)
+    for term, matches in postings.items():
+        idf = math.log(1 + (stats['count'] - len(matches) + 0.5) / (len(matches) + 0.5))
+        for pk, frequency, length in matches:
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+            scores[pk] += idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+    return heapq.nlargest(limit, scores, key=lambda pk: (scores[pk], pk))
+
+
+def search_questions(query, limit=RESULTS_LIMIT):
+    """
+    Queryset of the questions matching the query, ordered by relevance,
+    limited to the best limit (RESULTS_LIMIT) matches.
+    """
+    ids = rank(query, limit)
+    if not ids:
+        return Question.objects.annotate(search_rank=Value(0, output_field=IntegerField())).none()
+    return Question.objects.filter(pk__in=ids).annotate(search_rank=Case(
+        *[When(pk=pk, then=Value(position)) for position, pk in enumerate(ids)],
+        default=Value(len(ids)),
+        output_field=IntegerField()
+    )).order_by('search_rank')
@@ -1,25 +1,137 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q, Manager
+from django.db.models.query import QuerySet
 from rest_framework import serializers
 from account.serializers import ForQuestionsAccountSerializer
 from .models import Question, Answer, Comment, Like, Tag
+from .likes import apply_pending_events
+from tost.identity import get_identity_map
+from .generic import content_key
+from .permissions import is_owner
 
 
 class ContentTypeRelatedField(serializers.RelatedField):
     """
-    Custom fiels to user for content_object fields representation
+    Custom fiels to user for content_object fields representation.
+    It is rendered from content_type_id and object_id, the object itself
+    is never loaded.
     """
 
+    def get_attribute(self, instance):
+        return content_key(instance)
+
     def to_representation(self, value):
         """
         Serialize content_object to a simple textual representation
         """
-        if isinstance(value, Question):
-            return 'Question: %s' % value.id
-        elif isinstance(value, Answer):
-            return 'Answer: %s' % value.id
+        content_type_id, object_id = value
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        if model is Question:
+            return 'Question: %s' % object_id
+        elif model is Answer:
+            return 'Answer: %s' % object_id
         else:
             raise Exception('Unexpected type of tagged object')
 
 
+class AuthorsListSerializer(serializers.ListSerializer):
+    """
+    Loads the missing authors of all the listed rows at once, through the
+    identity map of the request.
+    """
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, Manager) else data)
+        get_identity_map(self.context.get('request')).attach(items, 'author')
+        return super(AuthorsListSerializer, self).to_representation(items)
+
+
+class SharedAuthorMixin(object):
+    """
+    Resolves the author through the identity map of the request, so every
+    account is loaded at most once per request and shared by all its rows.
+    """
+
+    def to_representation(self, instance):
+        get_identity_map(self.context.get('request')).attach([instance], 'author')
+        return super(SharedAuthorMixin, self).to_representation(instance)
+
+
+class SparseFieldsMixin(object):
+    """
+    Limits the output to the comma separated `fields` query parameter.
+    Fields listed in Meta.expandable_fields are left out unless they are
+    named in the `expand` query parameter or the serializer is created
+    with expand_all=True. A serializer given data keeps all its fields,
+    so `fields` never drops submitted values.
+    """
+
+    @staticmethod
+    def parse_field_list(request, param):
+        if request is None:
+            return set()
+        value = request.query_params.get(param, '')
+        return set(name.strip() for name in value.split(',') if name.strip())
+
+    def __init__(self, *args, **kwargs):
+        expand_all = kwargs.pop('expand_all', False)
+        super(SparseFieldsMixin, self).__init__(*args, **kwargs)
+        request = self.context.get('request')
+        fields = self.parse_field_list(request, 'fields')
+        expand = self.parse_field_list(request, 'expand')
+        for name in getattr(self.Meta, 'expandable_fields', ()):
+            if not expand_all and name not in expand:
+                self.fields.pop(name, None)
+        if fields and not hasattr(self, 'initial_data'):
+            for name in list(self.fields):
+                if name not in fields and name not in expand:
+                    self.fields.pop(name)
+
+
+def load_liked(user, instance):
+    """
+    Return the set of (content_type_id, object_id) keys liked by the user
+    among the questions and answers of a payload, including the answers
+    of its questions, loaded with a single query. The not yet compacted
+    like events of the user are applied on top.
+    """
+    if not user.is_authenticated():
+        return set()
+    objects = instance if isinstance(instance, (list, tuple, QuerySet)) else [instance]
+    question_ids = [obj.pk for obj in objects if isinstance(obj, Question)]
+    answer_ids = [obj.pk for obj in objects if isinstance(obj, Answer)]
+    question_type = ContentType.objects.get_for_model(Question)
+    answer_type = ContentType.objects.get_for_model(Answer)
+    condition = Q(content_type=answer_type, object_id__in=answer_ids)
+    if question_ids:
+        condition |= Q(content_type=question_type, object_id__in=question_ids)
+        condition |= Q(content_type=answer_type,
+                       object_id__in=Answer.objects.filter(question_id__in=question_ids).values('id'))
+    return liked_keys(user, condition)
+
+
+def liked_keys(user, condition):
+    """
+    Return the set of (content_type_id, object_id) keys of the likes of
+    the user matching condition, with the pending like events applied.
+    """
+    liked = set(Like.objects.filter(condition, author=user).values_list('content_type_id', 'object_id'))
+    return apply_pending_events(user, condition, liked)
+
+
+class AlreadyLikedMixin(object):
+    """
+    Resolves already_liked as a lookup in the keys liked by the requesting
+    user, loaded once per payload and shared through the serializer context.
+    """
+
+    def get_already_liked(self, obj):
+        liked = self.context.get('liked')
+        if liked is None:
+            liked = self.context['liked'] = load_liked(self.context['request'].user, self.root.instance)
+        return (ContentType.objects.get_for_model(obj).id, obj.pk) in liked
+
+
 class NestedTagSerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -27,12 +139,13 @@ class NestedTagSerializer(serializers.ModelSerializer):
         fields = ('id', 'name')
 
 
-class NestedLikeSerializer(serializers.ModelSerializer):
+class NestedLikeSerializer(SharedAuthorMixin, serializers.ModelSerializer):
     content_object = ContentTypeRelatedField(read_only=True)
     author = ForQuestionsAccountSerializer(read_only=True)
 
     class Meta:
         model = Like
+        list_serializer_class = AuthorsListSerializer
         fields = (
             'id',
             'author',
@@ -40,13 +153,14 @@ class NestedLikeSerializer(serializers.ModelSerializer):
         )
 
 
-class NestedCommentSerializer(serializers.ModelSerializer):
+class NestedCommentSerializer(SharedAuthorMixin, serializers.ModelSerializer):
     content_object = ContentTypeRelatedField(read_only=True)
     author = ForQuestionsAccountSerializer(read_only=True)
     my = serializers.SerializerMethodField()
 
     class Meta:
         model = Comment
+        list_serializer_class = AuthorsListSerializer
         fields = (
             'id',
             'content',
@@ -56,12 +170,10 @@ class NestedCommentSerializer(serializers.ModelSerializer):
         )
 
     def get_my(self, obj):
-        if obj.author == self.context['request'].user:
-            return True
-        return False
+        return is_owner(self.context['request'].user, obj)
 
 
-class AnswerSerializer(serializers.ModelSerializer):
+class AnswerSerializer(SharedAuthorMixin, AlreadyLikedMixin, serializers.ModelSerializer):
     author = ForQuestionsAccountSerializer(read_only=True)
     comments = NestedCommentSerializer(many=True, read_only=True)
     already_liked = serializers.SerializerMethodField()
@@ -69,6 +181,7 @@ class AnswerSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Answer
+        list_serializer_class = AuthorsListSerializer
         fields = (
             'id',
             'content',
@@ -80,19 +193,11 @@ class AnswerSerializer(serializers.ModelSerializer):
             'solution',
         )
 
-    def get_already_liked(self, obj):
-        for like in Like.objects.all():
-            if like.author == self.context['request'].user and like.content_object == obj:
-                return True
-        return False
-
     def get_my(self, obj):
-        if obj.author == self.context['request'].user:
-            return True
-        return False
+        return is_owner(self.context['request'].user, obj)
 
 
-class QuestionSerializer(serializers.ModelSerializer):
+class QuestionSerializer(SharedAuthorMixin, SparseFieldsMixin, AlreadyLikedMixin, serializers.ModelSerializer):
     author = ForQuestionsAccountSerializer(read_only=True)
     answers = AnswerSerializer(many=True, read_only=True)
     tags = NestedTagSerializer(many=True, read_only=True)
@@ -102,6 +207,7 @@ class QuestionSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Question
+        list_serializer_class = AuthorsListSerializer
         fields = (
             'id',
             'summary',
@@ -114,14 +220,10 @@ class QuestionSerializer(serializers.ModelSerializer):
             'already_liked',
             'my',
         )
-
-    def get_already_liked(self, obj):
-        for like in Like.objects.all():
-            if like.author == self.context['request'].user and like.content_object == obj:
-                return True
-        return False
+        expandable_fields = (
+            'answers',
+            'comments',
+        )
 
     def get_my(self, obj):
-        if obj.author == self.context['request'].user:
-            return True
-        return False
\ No newline at end of file
+        return is_owner(self.context['request'].user, obj)
\ No newline at end of file
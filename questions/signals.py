@@ -0,0 +1,233 @@
+from django.db.models.signals import post_init, post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+from .models import Tag, Question, Answer, Comment, Like, TaggedQuestion, SimilarQuestion, QuestionChange
+from .counters import COUNTER_FIELDS, get_target, get_cached_target, shift_counter
+from .versioning import bump_version, bump_versions
+from .search import index_question, expire_results
+from .tag_index import add_entries, remove_entries, forget_question
+from .similarity import refresh_similar, refresh_referrers
+from .changes import record_answer_change, record_comment_change, record_likes_change
+from account.stats import stats_key, stats_deltas, shift_stats
+
+
+# ================================================
+# ============ Counters and versions =============
+# ================================================
+
+
+@receiver(post_init, sender=Answer)
+@receiver(post_init, sender=Comment)
+@receiver(post_init, sender=Like)
+def remember_counted_target(sender, instance, **kwargs):
+    instance._counted_target = get_target(instance)
+
+
+@receiver(post_save, sender=Answer)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=Like)
+def update_counters_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    field = COUNTER_FIELDS[sender]
+    old_model, old_pk = (None, None) if created else instance._counted_target
+    new_model, new_pk = get_target(instance)
+    if (old_model, old_pk) != (new_model, new_pk):
+        if old_model is not None:
+            shift_counter(old_model, old_pk, field, -1)
+        if new_model is not None:
+            shift_counter(new_model, new_pk, field, 1, get_cached_target(instance))
+    elif new_model is not None:
+        bump_version(new_model, new_pk, get_cached_target(instance))
+    instance._counted_target = (new_model, new_pk)
+
+
+@receiver(post_delete, sender=Answer)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Like)
+def update_counters_on_delete(sender, instance, **kwargs):
+    model, pk = instance._counted_target
+    if model is not None:
+        shift_counter(model, pk, COUNTER_FIELDS[sender], -1, get_cached_target(instance))
+
+
+# ================================================
+# ============== Account statistics ==============
+# ================================================
+
+
+@receiver(post_init, sender=Question)
+@receiver(post_init, sender=Answer)
+def remember_stats_key(sender, instance, **kwargs):
+    instance._stats_key = stats_key(instance)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_save, sender=Answer)
+def update_stats_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_key = None if created else instance._stats_key
+    new_key = stats_key(instance)
+    if (created or old_key is not None) and old_key != new_key:
+        if old_key is not None:
+            shift_stats(old_key[0], stats_deltas(sender, old_key, -1))
+        shift_stats(new_key[0], stats_deltas(sender, new_key, 1))
+    instance._stats_key = new_key
+
+
+@receiver(post_delete, sender=Question)
+@receiver(post_delete, sender=Answer)
+def update_stats_on_delete(sender, instance, **kwargs):
+    key = instance._stats_key or stats_key(instance)
+    if key is not None:
+        shift_stats(key[0], stats_deltas(sender, key, -1))
+
+
+# ================================================
+# ================== Versions ====================
+# ================================================
+
+
+@receiver(post_save, sender=Question)
+def bump_version_on_save(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        bump_version(Question, instance.pk, instance)
+
+
+@receiver(m2m_changed, sender=Question.tags.through)
+def bump_version_on_tags_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            bump_version(Question, instance.pk, instance)
+    elif action == 'pre_clear':
+        bump_versions(tags=instance)
+    elif action in ('post_add', 'post_remove'):
+        bump_versions(pk__in=pk_set)
+
+
+@receiver(post_save, sender=Tag)
+def bump_version_on_tag_rename(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        bump_versions(tags=instance)
+
+
+# ================================================
+# ================= Tag index ====================
+# ================================================
+
+
+@receiver(m2m_changed, sender=Question.tags.through)
+def update_tag_index(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        entries = TaggedQuestion.objects.filter(tag=instance)
+        pairs = [(instance.pk, pk) for pk in pk_set or ()]
+        lookup = 'question__in'
+    else:
+        entries = TaggedQuestion.objects.filter(question=instance)
+        pairs = [(pk, instance.pk) for pk in pk_set or ()]
+        lookup = 'tag__in'
+    if action == 'post_add':
+        add_entries(pairs)
+    elif action == 'post_remove':
+        remove_entries(entries.filter(**{lookup: pk_set}))
+    elif action == 'post_clear':
+        remove_entries(entries)
+
+
+@receiver(pre_delete, sender=Question)
+def forget_deleted_question(sender, instance, **kwargs):
+    forget_question(instance)
+
+
+# ================================================
+# ============== Similar questions ===============
+# ================================================
+
+
+@receiver(m2m_changed, sender=Question.tags.through)
+def update_similar_questions(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == 'pre_clear':
+        instance._similar_affected = list(
+            TaggedQuestion.objects.filter(tag=instance).values_list('question_id', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        affected = [instance.pk]
+    elif action == 'post_clear':
+        affected = instance.__dict__.pop('_similar_affected', [])
+    else:
+        affected = pk_set
+    for pk in affected:
+        refresh_similar(pk)
+
+
+@receiver(pre_delete, sender=Question)
+def remember_similar_referrers(sender, instance, **kwargs):
+    instance._similar_referrers = list(
+        SimilarQuestion.objects.filter(similar=instance).exclude(question=instance)
+        .values_list('question_id', flat=True))
+
+
+@receiver(post_delete, sender=Question)
+def refresh_similar_referrers(sender, instance, **kwargs):
+    refresh_referrers(getattr(instance, '_similar_referrers', []))
+
+
+# ================================================
+# ================= Change log ===================
+# ================================================
+
+
+@receiver(post_save, sender=Answer)
+def record_saved_answer(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record_answer_change(instance)
+
+
+@receiver(post_delete, sender=Answer)
+def record_deleted_answer(sender, instance, **kwargs):
+    record_answer_change(instance, deleted=True)
+
+
+@receiver(post_save, sender=Comment)
+def record_saved_comment(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record_comment_change(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def record_deleted_comment(sender, instance, **kwargs):
+    record_comment_change(instance, deleted=True)
+
+
+@receiver(post_save, sender=Like)
+@receiver(post_delete, sender=Like)
+def record_likes_changes(sender, instance, raw=False, **kwargs):
+    if not raw:
+        model, pk = get_target(instance)
+        record_likes_change(model, pk, get_cached_target(instance))
+
+
+@receiver(post_delete, sender=Question)
+def forget_question_changes(sender, instance, **kwargs):
+    QuestionChange.objects.filter(question_id=instance.pk).delete()
+
+
+# ================================================
+# ================ Search index ==================
+# ================================================
+
+
+@receiver(post_save, sender=Question)
+def update_search_index(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not {'summary', 'content'} & set(update_fields):
+        return
+    index_question(instance)
+
+
+@receiver(post_delete, sender=Question)
+def expire_search_results(sender, instance, **kwargs):
+    expire_results()
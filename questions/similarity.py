@@ -0,0 +1,115 @@
+from collections import Counter, defaultdict
+from django.db import transaction
+from django.db.models import Count
+from .models import TaggedQuestion, SimilarQuestion
+
+
+# Number of neighbours stored for every question.
+NEIGHBOURS = 4
+
+# Number of questions sharing most tags that are scored when a single
+# question is refreshed.
+CANDIDATES = 200
+
+BULK_CREATE_CHUNK = 500
+
+
+def jaccard(shared, size, other_size):
+    return float(shared) / (size + other_size - shared)
+
+
+def _top(scores):
+    return sorted(scores.items(), key=lambda item: (-item[1], -item[0]))[:NEIGHBOURS]
+
+
+def compute_neighbours(pk):
+    """
+    Return [(question id, score)] of the questions most similar to the
+    given one by the Jaccard index of their tag sets.
+    """
+    tags = list(TaggedQuestion.objects.filter(question_id=pk).values_list('tag_id', flat=True))
+    if not tags:
+        return []
+    shared = dict(
+        TaggedQuestion.objects.filter(tag_id__in=tags).exclude(question_id=pk)
+        .values_list('question_id').annotate(shared=Count('id')).order_by('-shared', '-question_id')[:CANDIDATES]
+    )
+    sizes = dict(
+        TaggedQuestion.objects.filter(question_id__in=shared.keys())
+        .values_list('question_id').annotate(size=Count('id')).order_by()
+    )
+    return _top(dict(
+        (other, jaccard(count, len(tags), sizes[other])) for other, count in shared.items()
+    ))
+
+
+def store_neighbours(pk, neighbours):
+    SimilarQuestion.objects.filter(question_id=pk).delete()
+    SimilarQuestion.objects.bulk_create([
+        SimilarQuestion(question_id=pk, similar_id=other, score=score) for other, score in neighbours
+    ])
+
+
+def offer_neighbour(pk, other, score):
+    """
+    Put other into the neighbours of pk if it is more similar than
+    one of them or there is a free place.
+    """
+    current = dict(SimilarQuestion.objects.filter(question_id=pk).values_list('similar_id', 'score'))
+    candidates = dict(current)
+    candidates[other] = score
+    neighbours = _top(candidates)
+    if dict(neighbours) != current:
+        store_neighbours(pk, neighbours)
+
+
+def refresh_similar(pk):
+    """
+    Recompute the neighbours of a question whose tags have changed. Its new
+    neighbours are offered the question in return, while the questions which
+    listed it before are recomputed, as its score for them may have dropped.
+    """
+    referrers = set(SimilarQuestion.objects.filter(similar_id=pk).values_list('question_id', flat=True))
+    neighbours = compute_neighbours(pk)
+    with transaction.atomic():
+        store_neighbours(pk, neighbours)
+        for other, score in neighbours:
+            if other not in referrers:
+                offer_neighbour(other, pk, score)
+        for other in referrers:
+            store_neighbours(other, compute_neighbours(other))
+
+
+def refresh_referrers(pks):
+    """
+    Recompute the neighbours of the given questions, e.g. after one of
+    their neighbours was deleted.
+    """
+    for pk in pks:
+        store_neighbours(pk, compute_neighbours(pk))
+
+
+def rebuild_similar():
+    """
+    Recompute the neighbours of all questions from the tag index in memory.
+    """
+    tags_of = defaultdict(set)
+    questions_of = defaultdict(list)
+    for question_id, tag_id in TaggedQuestion.objects.values_list('question_id', 'tag_id').iterator():
+        tags_of[question_id].add(tag_id)
+        questions_of[tag_id].append(question_id)
+    with transaction.atomic():
+        SimilarQuestion.objects.all().delete()
+        batch = []
+        for pk, tags in tags_of.items():
+            shared = Counter()
+            for tag_id in tags:
+                shared.update(questions_of[tag_id])
+            del shared[pk]
+            for other, score in _top(dict(
+                    (other, jaccard(count, len(tags), len(tags_of[other]))) for other, count in shared.items())):
+                batch.append(SimilarQuestion(question_id=pk, similar_id=other, score=score))
+            if len(batch) >= BULK_CREATE_CHUNK:
+                SimilarQuestion.objects.bulk_create(batch)
+                batch = []
+        SimilarQuestion.objects.bulk_create(batch)
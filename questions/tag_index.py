@@ -0,0 +1,86 @@
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import F, Count
+from .models import Tag, Question, TaggedQuestion
+
+
+BULK_UPDATE_CHUNK = 500
+
+
+def _shift_counts(tag_ids, sign):
+    """
+    Shift questions_count of every tag by sign times the number of its
+    occurrences in tag_ids, one UPDATE per distinct number.
+    """
+    occurrences = defaultdict(int)
+    for tag_id in tag_ids:
+        occurrences[tag_id] += 1
+    by_count = defaultdict(list)
+    for tag_id, count in occurrences.items():
+        by_count[count].append(tag_id)
+    for count, ids in by_count.items():
+        queryset = Tag.objects.filter(pk__in=ids)
+        if sign < 0:
+            queryset = queryset.filter(questions_count__gte=count)
+        queryset.update(questions_count=F('questions_count') + sign * count)
+
+
+def add_entries(pairs):
+    """
+    Add (tag_id, question_id) pairs to the index.
+    """
+    if not pairs:
+        return
+    questions = dict(
+        (pk, (created_at, score)) for pk, created_at, score in
+        Question.objects.filter(pk__in=set(question_id for tag_id, question_id in pairs))
+        .values_list('id', 'created_at', 'score')
+    )
+    entries = [
+        TaggedQuestion(tag_id=tag_id, question_id=question_id,
+                       created_at=questions[question_id][0], score=questions[question_id][1])
+        for tag_id, question_id in pairs if question_id in questions
+    ]
+    TaggedQuestion.objects.bulk_create(entries)
+    _shift_counts([entry.tag_id for entry in entries], 1)
+
+
+def remove_entries(entries):
+    """
+    Remove the entries of the given TaggedQuestion queryset.
+    """
+    tag_ids = list(entries.values_list('tag_id', flat=True))
+    entries.delete()
+    _shift_counts(tag_ids, -1)
+
+
+def forget_question(question):
+    """
+    Decrement the counts of the tags of a question which is being deleted,
+    its entries go away with it.
+    """
+    _shift_counts(list(TaggedQuestion.objects.filter(question=question).values_list('tag_id', flat=True)), -1)
+
+
+def rebuild_tag_index():
+    """
+    Recompute all the entries and per tag counts from the tags relation.
+    """
+    through = Question.tags.through
+    with transaction.atomic():
+        TaggedQuestion.objects.all().delete()
+        Tag.objects.update(questions_count=0)
+        rows = through.objects.values_list('tag_id', 'question_id', 'question__created_at', 'question__score')
+        batch = []
+        for tag_id, question_id, created_at, score in rows.iterator():
+            batch.append(TaggedQuestion(tag_id=tag_id, question_id=question_id, created_at=created_at, score=score))
+            if len(batch) >= BULK_UPDATE_CHUNK:
+                TaggedQuestion.objects.bulk_create(batch)
+                batch = []
+        TaggedQuestion.objects.bulk_create(batch)
+        by_count = defaultdict(list)
+        for tag_id, count in through.objects.values_list('tag_id').annotate(count=Count('id')).order_by():
+            by_count[count].append(tag_id)
+        for count, tag_ids in by_count.items():
+            for start in range(0, len(tag_ids), BULK_UPDATE_CHUNK):
+                Tag.objects.filter(pk__in=tag_ids[start:start + BULK_UPDATE_CHUNK]).update(questions_count=count)
@@ -0,0 +1,21 @@
+from celery import shared_task
+from django.conf import settings
+from .ranking import rebuild_scores
+from .likes import COMPACTION_BATCH, compact_like_events
+from .changes import prune_changes
+
+
+@shared_task
+def rebuild_question_scores():
+    rebuild_scores()
+
+
+@shared_task
+def compact_likes():
+    while compact_like_events() == COMPACTION_BATCH:
+        pass
+
+
+@shared_task
+def prune_question_changes():
+    prune_changes(getattr(settings, 'QUESTIONS_CHANGES_RETENTION', 7))
@@ -0,0 +1,97 @@
+import shutil
+import tempfile
+from django.test import TestCase, override_settings
+from django.core.cache import caches
+from account.models import Account
+from .models import Question, Answer, Comment, Like
+from .cards import card_key, render_cards
+
+
+class VersionTest(TestCase):
+
+    def setUp(self):
+        self.account = Account.objects.create_user(
+            username='Andrew',
+            email='pop@tut.by',
+            password='homm1994'
+        )
+        self.question = Question.objects.create(summary='Summary', content='Content', author=self.account)
+        self.answer = Answer.objects.create(content='Answer', question=self.question, author=self.account)
+
+    def version(self):
+        return Question.objects.get(pk=self.question.id).version
+
+    def test_bumped_by_question_change(self):
+        version = self.version()
+        self.question.summary = 'Other summary'
+        self.question.save()
+        self.assertEqual(self.version(), version + 1)
+
+    def test_bumped_by_answer_change(self):
+        version = self.version()
+        self.answer.solution = True
+        self.answer.save()
+        self.assertEqual(self.version(), version + 1)
+
+    def test_bumped_by_comment_and_like_on_answer(self):
+        version = self.version()
+        Comment.objects.create(content='Comment', content_object=self.answer, author=self.account)
+        like = Like.objects.create(content_object=self.answer, author=self.account)
+        like.delete()
+        self.assertEqual(self.version(), version + 3)
+
+
+class CardsCacheTestMixin(object):
+
+    def setUp(self):
+        caches[self.alias].clear()
+        account = Account.objects.create_user(
+            username='Andrew',
+            email='pop@tut.by',
+            password='homm1994'
+        )
+        self.question = Question.objects.create(summary='Cached summary', content='Content', author=account)
+        self.account = account
+
+    def test_caches_rendered_cards(self):
+        question, html = render_cards([self.question])[0]
+        self.assertIn('Cached summary', html)
+        self.assertEqual(caches[self.alias].get(card_key(self.question)), html)
+
+    def test_reuses_cached_cards(self):
+        caches[self.alias].set(card_key(self.question), 'cached card')
+        self.assertEqual(render_cards([self.question])[0][1], 'cached card')
+
+    def test_change_invalidates_card(self):
+        render_cards([self.question])
+        Like.objects.create(content_object=self.question, author=self.account)
+        question = Question.objects.get(pk=self.question.id)
+        self.assertIn('1 likes', render_cards([question])[0][1])
+
+
+@override_settings(QUESTIONS_CARDS_CACHE='cards', CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'cards': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'cards'},
+})
+class LocMemCardsCacheTest(CardsCacheTestMixin, TestCase):
+    alias = 'cards'
+
+
+class FileBasedCardsCacheTest(CardsCacheTestMixin, TestCase):
+    alias = 'cards'
+
+    @classmethod
+    def setUpClass(cls):
+        cls.cache_dir = tempfile.mkdtemp()
+        cls.settings_override = override_settings(QUESTIONS_CARDS_CACHE='cards', CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'cards': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': cls.cache_dir},
+        })
+        cls.settings_override.enable()
+        super(FileBasedCardsCacheTest, cls).setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super(FileBasedCardsCacheTest, cls).tearDownClass()
+        cls.settings_override.disable()
+        shutil.rmtree(cls.cache_dir)
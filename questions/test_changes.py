@@ -0,0 +1,102 @@
+from datetime import timedelta
+from django.test import override_settings
+from django.utils import timezone
+from django.core.urlresolvers import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from account.models import Account
+from .models import Question, Answer, Comment, Like, QuestionChange
+from .likes import like_object, compact_like_events
+from .changes import prune_changes
+
+
+class ChangesViewTest(APITestCase):
+
+    def setUp(self):
+        self.account = Account.objects.create_user(
+            username='Andrew',
+            email='pop@tut.by',
+            password='homm1994'
+        )
+        self.question = Question.objects.create(summary='Some title', content='Some text', author=self.account)
+        self.answer = Answer.objects.create(content='Some answer', question=self.question, author=self.account)
+        self.url = reverse('questions:questions-detail', args=(self.question.id,)) + 'changes/'
+        self.client.force_authenticate(user=self.account)
+
+    def cursor(self):
+        return self.client.get(self.url).data['cursor']
+
+    def test_returns_403_to_anon_user(self):
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_rejects_invalid_cursor(self):
+        response = self.client.get(self.url, {'since': 'x'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_no_changes(self):
+        cursor = self.cursor()
+        response = self.client.get(self.url, {'since': cursor})
+        self.assertEqual(response.data, {'cursor': cursor, 'answers': [], 'comments': [], 'likes': [], 'deleted': []})
+
+    def test_returns_changes_since_cursor(self):
+        cursor = self.cursor()
+        other_answer = Answer.objects.create(content='Other answer', question=self.question, author=self.account)
+        comment = Comment.objects.create(content='Some comment', content_object=self.answer, author=self.account)
+        Like.objects.create(content_object=self.question, author=self.account)
+        self.answer.solution = True
+        self.answer.save()
+        other_answer_id = other_answer.id
+        other_answer.delete()
+        response = self.client.get(self.url, {'since': cursor})
+        self.assertEqual([answer['id'] for answer in response.data['answers']], [self.answer.id])
+        self.assertTrue(response.data['answers'][0]['solution'])
+        self.assertEqual([item['id'] for item in response.data['comments']], [comment.id])
+        self.assertEqual(response.data['likes'], [
+            {'content_object': 'Question: %d' % self.question.id, 'likes_count': 1, 'already_liked': True},
+        ])
+        self.assertEqual(response.data['deleted'], [{'type': 'answer', 'id': other_answer_id}])
+        response = self.client.get(self.url, {'since': response.data['cursor']})
+        self.assertEqual(response.data['answers'] + response.data['deleted'], [])
+
+    def test_comment_tombstones(self):
+        comment = Comment.objects.create(content='Some comment', content_object=self.question, author=self.account)
+        cursor = self.cursor()
+        comment_id = comment.id
+        comment.delete()
+        response = self.client.get(self.url, {'since': cursor})
+        self.assertEqual(response.data['deleted'], [{'type': 'comment', 'id': comment_id}])
+
+    @override_settings(QUESTIONS_HOT_LIKES=0)
+    def test_compacted_likes(self):
+        cursor = self.cursor()
+        like_object(self.account, self.answer)
+        compact_like_events()
+        response = self.client.get(self.url, {'since': cursor})
+        self.assertEqual(response.data['likes'], [
+            {'content_object': 'Answer: %d' % self.answer.id, 'likes_count': 1, 'already_liked': True},
+        ])
+
+    def test_question_deletion_forgets_changes(self):
+        self.question.delete()
+        self.assertEqual(QuestionChange.objects.count(), 0)
+
+    def test_prune_keeps_recent_and_newest_changes(self):
+        newest = Answer.objects.create(content='Newest answer', question=self.question, author=self.account)
+        QuestionChange.objects.update(created_at=timezone.now() - timedelta(days=8))
+        prune_changes(7)
+        self.assertEqual(list(QuestionChange.objects.values_list('object_id', flat=True)), [newest.id])
+        comment = Comment.objects.create(content='Some comment', content_object=newest, author=self.account)
+        prune_changes(7)
+        self.assertEqual(list(QuestionChange.objects.values_list('object_id', flat=True)), [comment.id])
+
+    def test_stale_cursor_resyncs(self):
+        cursor = self.cursor()
+        Answer.objects.create(content='Other answer', question=self.question, author=self.account)
+        Answer.objects.create(content='Newest answer', question=self.question, author=self.account)
+        QuestionChange.objects.update(created_at=timezone.now() - timedelta(days=8))
+        prune_changes(7)
+        response = self.client.get(self.url, {'since': cursor})
+        self.assertEqual(response.data, {'cursor': self.cursor(), 'resync': True})
+        response = self.client.get(self.url, {'since': response.data['cursor']})
+        self.assertNotIn('resync', response.data)
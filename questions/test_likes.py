@@ -0,0 +1,124 @@
+from django.test import TestCase, override_settings
+from django.contrib.contenttypes.models import ContentType
+from account.models import Account
+from .models import Question, Answer, Like, LikeEvent, QuestionChange
+from .likes import (
+    like_object,
+    unlike_object,
+    toggle_object_like,
+    compact_like_events,
+    delete_like,
+    shown_likes_count,
+)
+from .serializers import load_liked
+
+
+@override_settings(QUESTIONS_HOT_LIKES=2)
+class LikeEventsTest(TestCase):
+
+    def setUp(self):
+        self.account = Account.objects.create_user(
+            username='Andrew',
+            email='pop@tut.by',
+            password='homm1994'
+        )
+        self.other_account = Account.objects.create_user(
+            username='Other',
+            email='other@tut.by',
+            password='homm1994'
+        )
+        self.third_account = Account.objects.create_user(
+            username='Third',
+            email='third@tut.by',
+            password='homm1994'
+        )
+        self.question = Question.objects.create(summary='Summary', content='Content', author=self.account)
+        self.answer = Answer.objects.create(content='Answer', question=self.question, author=self.account)
+
+    def make_hot(self):
+        like_object(self.other_account, self.question)
+        like_object(self.third_account, self.question)
+        self.question = Question.objects.get(pk=self.question.id)
+
+    def test_cold_likes_are_written_directly(self):
+        self.assertTrue(like_object(self.account, self.question))
+        self.assertEqual(Like.objects.count(), 1)
+        self.assertEqual(LikeEvent.objects.count(), 0)
+
+    def test_hot_likes_are_logged(self):
+        self.make_hot()
+        self.assertTrue(like_object(self.account, self.question))
+        self.assertFalse(like_object(self.account, self.question))
+        self.assertEqual(Like.objects.count(), 2)
+        self.assertEqual(LikeEvent.objects.count(), 1)
+        self.assertEqual(Question.objects.get(pk=self.question.id).likes_count, 2)
+        self.assertEqual(shown_likes_count(self.account, self.question), 3)
+        self.assertEqual(shown_likes_count(self.other_account, self.question), 2)
+
+    def test_own_writes_are_visible(self):
+        self.make_hot()
+        question_type = ContentType.objects.get_for_model(Question)
+        like_object(self.account, self.question)
+        self.assertIn((question_type.id, self.question.id), load_liked(self.account, self.question))
+        self.assertIn((question_type.id, self.question.id), load_liked(self.other_account, self.question))
+        self.assertTrue(unlike_object(self.other_account, self.question))
+        self.assertNotIn((question_type.id, self.question.id), load_liked(self.other_account, self.question))
+        self.assertFalse(toggle_object_like(self.account, self.question))
+        self.assertNotIn((question_type.id, self.question.id), load_liked(self.account, self.question))
+
+    def test_compaction_applies_last_event(self):
+        self.make_hot()
+        version = self.question.version
+        like_object(self.account, self.question)
+        unlike_object(self.other_account, self.question)
+        unlike_object(self.third_account, self.question)
+        like_object(self.third_account, self.question)
+        self.assertEqual(compact_like_events(), 4)
+        self.assertEqual(LikeEvent.objects.count(), 0)
+        self.assertEqual(
+            set(Like.objects.values_list('author_id', flat=True)),
+            set([self.account.id, self.third_account.id])
+        )
+        question = Question.objects.get(pk=self.question.id)
+        self.assertEqual(question.likes_count, 2)
+        self.assertEqual(question.score, 2)
+        self.assertEqual(question.version, version + 1)
+        self.assertEqual(compact_like_events(), 0)
+
+    def test_compaction_in_batches(self):
+        self.make_hot()
+        like_object(self.account, self.question)
+        unlike_object(self.other_account, self.question)
+        self.assertEqual(compact_like_events(batch_size=1), 1)
+        self.assertEqual(Question.objects.get(pk=self.question.id).likes_count, 3)
+        self.assertEqual(compact_like_events(batch_size=1), 1)
+        self.assertEqual(Question.objects.get(pk=self.question.id).likes_count, 2)
+        self.assertTrue(like_object(self.other_account, self.question))
+
+
+class DeleteLikeTest(TestCase):
+
+    def setUp(self):
+        self.account = Account.objects.create_user(
+            username='Andrew',
+            email='pop@tut.by',
+            password='homm1994'
+        )
+        self.question = Question.objects.create(summary='Summary', content='Content', author=self.account)
+        self.answer = Answer.objects.create(content='Answer', question=self.question, author=self.account)
+
+    def test_concurrent_deletes_count_once(self):
+        like_object(self.account, self.answer)
+        like, stale = Like.objects.get(), Like.objects.get()
+        changes = QuestionChange.objects.count()
+        self.assertTrue(delete_like(like))
+        self.assertFalse(delete_like(stale))
+        self.assertEqual(Answer.objects.get(pk=self.answer.pk).likes_count, 0)
+        self.assertEqual(QuestionChange.objects.count(), changes + 1)
+
+    def test_unlike(self):
+        like_object(self.account, self.question)
+        self.assertTrue(unlike_object(self.account, self.question))
+        self.assertEqual(self.question.likes_count, 0)
+        self.assertFalse(unlike_object(self.account, self.question))
+        self.assertEqual(Question.objects.get(pk=self.question.pk).likes_count, 0)
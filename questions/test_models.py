@@ -1,6 +1,10 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.db import transaction, IntegrityError
+from django.core.management import call_command
+from django.utils.six import StringIO
 from account.models import Account
 from .models import Question, Answer, Comment, Like
+from .ranking import rebuild_scores
 
 
 # ===========================================
@@ -353,4 +357,108 @@ class LikeModelTest(ContentTypeTestMixin, TestCase):
             author=self.account,
             content_object=self.answer
         )
-        self.assertEqual(like.__str__(), '%s: %s' % (like.author.username, like.created_at))
\ No newline at end of file
+        self.assertEqual(like.__str__(), '%s: %s' % (like.author.username, like.created_at))
+
+    def test_author_likes_object_once(self):
+        Like.objects.create(author=self.account, content_object=self.answer)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Like.objects.create(author=self.account, content_object=self.answer)
+        self.assertEqual(Like.objects.count(), 1)
+
+class CountersTest(ContentTypeTestMixin, TestCase):
+
+    def reload(self):
+        self.question = Question.objects.get(pk=self.question.id)
+        self.answer = Answer.objects.get(pk=self.answer.id)
+
+    def test_answer_creation_and_deletion(self):
+        self.reload()
+        self.assertEqual(self.question.answers_count, 1)
+        self.answer.delete()
+        question = Question.objects.get(pk=self.question.id)
+        self.assertEqual(question.answers_count, 0)
+
+    def test_comment_deletion(self):
+        comment = Comment.objects.create(
+            author=self.account,
+            content_object=self.answer,
+            content='Some sweet words'
+        )
+        Comment.objects.get(pk=comment.id).delete()
+        self.reload()
+        self.assertEqual(self.answer.comments_count, 0)
+
+    def test_like_moved_to_another_object(self):
+        like = Like.objects.create(
+            author=self.account,
+            content_object=self.answer
+        )
+        like.content_object = self.question
+        like.save()
+        self.reload()
+        self.assertEqual(self.answer.likes_count, 0)
+        self.assertEqual(self.question.likes_count, 1)
+
+    def test_stale_instance_does_not_overwrite_counters(self):
+        stale = Question.objects.get(pk=self.question.id)
+        Like.objects.create(
+            author=self.account,
+            content_object=self.question
+        )
+        stale.summary = 'Changed summary'
+        stale.save()
+        self.reload()
+        self.assertEqual(self.question.likes_count, 1)
+        self.assertEqual(self.question.summary, 'Changed summary')
+
+    def test_rebuild_counters_command(self):
+        Comment.objects.create(
+            author=self.account,
+            content_object=self.question,
+            content='Some sweet words'
+        )
+        Like.objects.create(
+            author=self.account,
+            content_object=self.answer
+        )
+        Question.objects.update(answers_count=0, comments_count=0, likes_count=5)
+        Answer.objects.update(likes_count=0)
+        version = Question.objects.get(pk=self.question.pk).version
+        call_command('rebuild_counters', stdout=StringIO())
+        self.reload()
+        self.assertGreater(self.question.version, version)
+        version = self.question.version
+        call_command('rebuild_counters', stdout=StringIO())
+        self.reload()
+        self.assertEqual(self.question.version, version)
+        self.assertEqual(self.question.answers_count, 1)
+        self.assertEqual(self.question.comments_count, 1)
+        self.assertEqual(self.question.likes_count, 0)
+        self.assertEqual(self.answer.likes_count, 1)
+
+
+class ScoreTest(ContentTypeTestMixin, TestCase):
+
+    def test_score_follows_likes(self):
+        like = Like.objects.create(
+            author=self.account,
+            content_object=self.question
+        )
+        self.assertEqual(Question.objects.get(pk=self.question.id).score, 1)
+        like.delete()
+        self.assertEqual(Question.objects.get(pk=self.question.id).score, 0)
+
+    def test_rebuild_scores_without_gravity_is_a_no_op(self):
+        Question.objects.filter(pk=self.question.id).update(likes_count=4)
+        with self.assertNumQueries(0):
+            rebuild_scores()
+        self.assertEqual(Question.objects.get(pk=self.question.id).score, 0)
+        rebuild_scores(force=True)
+        self.assertEqual(Question.objects.get(pk=self.question.id).score, 4)
+
+    @override_settings(QUESTIONS_SCORE_GRAVITY=1.8)
+    def test_rebuild_scores_applies_time_decay(self):
+        Question.objects.filter(pk=self.question.id).update(likes_count=4)
+        rebuild_scores()
+        score = Question.objects.get(pk=self.question.id).score
+        self.assertTrue(0 < score < 4)
@@ -0,0 +1,52 @@
+from django.test import TestCase
+from account.models import Account
+from .models import Question
+from .pagination import KeysetPaginator
+
+
+class KeysetPaginatorTest(TestCase):
+
+    def setUp(self):
+        account = Account.objects.create_user(
+            username='Andrew',
+            email='pop@tut.by',
+            password='homm1994'
+        )
+        self.questions = [
+            Question.objects.create(summary='Question %d' % n, content='Content', author=account)
+            for n in range(14)
+        ]
+        self.paginator = KeysetPaginator(Question.objects.all(), 3, ('-created_at', '-id'))
+
+    def cursor_of(self, page, number):
+        return dict(page.window)[number]
+
+    def test_first_page(self):
+        page = self.paginator.page()
+        self.assertEqual(list(page), self.questions[::-1][:3])
+        self.assertEqual(page.number, 1)
+        self.assertEqual([number for number, cursor in page.window], [1, 2, 3])
+        self.assertFalse(page.has_previous())
+
+    def test_walks_forward_through_all_pages(self):
+        page = self.paginator.page()
+        seen = list(page)
+        while page.has_next():
+            page = self.paginator.page(self.cursor_of(page, page.number + 1))
+            seen.extend(page)
+        self.assertEqual(seen, self.questions[::-1])
+        self.assertEqual(page.number, 5)
+
+    def test_jumps_within_window_and_back(self):
+        first = self.paginator.page()
+        third = self.paginator.page(self.cursor_of(first, 3))
+        self.assertEqual(list(third), self.questions[::-1][6:9])
+        self.assertEqual([number for number, cursor in third.window], [1, 2, 3, 4, 5])
+        second = self.paginator.page(self.cursor_of(third, 2))
+        self.assertEqual(list(second), self.questions[::-1][3:6])
+        self.assertIsNone(self.cursor_of(third, 1))
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        page = self.paginator.page('garbage')
+        self.assertEqual(page.number, 1)
+        self.assertEqual(list(page), self.questions[::-1][:3])
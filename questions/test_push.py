@@ -0,0 +1,107 @@
+import json
+from datetime import timedelta
+from django.utils import timezone
+from django.test import TestCase, override_settings
+from django.core.urlresolvers import reverse
+from account.models import Account
+from .models import Question, Answer, QuestionChange
+from .push import InProcessHub, get_hub, question_channel
+from .changes import latest_cursor, prune_changes
+from .events import question_events
+
+
+class InProcessHubTest(TestCase):
+
+    def test_fans_out_to_every_subscription(self):
+        hub = InProcessHub()
+        first, second = hub.subscribe('question-1'), hub.subscribe('question-1')
+        other = hub.subscribe('question-2')
+        hub.publish('question-1', 5)
+        self.assertEqual(first.get(0), 5)
+        self.assertEqual(second.get(0), 5)
+        self.assertIsNone(other.get(0))
+
+    def test_closed_subscription_gets_nothing(self):
+        hub = InProcessHub()
+        subscription = hub.subscribe('question-1')
+        subscription.close()
+        hub.publish('question-1', 5)
+        self.assertIsNone(subscription.get(0))
+
+
+class QuestionEventsTest(TestCase):
+
+    def setUp(self):
+        self.account = Account.objects.create_user(
+            username='Andrew',
+            email='pop@tut.by',
+            password='homm1994'
+        )
+        self.question = Question.objects.create(summary='Some title', content='Some text', author=self.account)
+        self.url = reverse('questions:questions_events', args=(self.question.id,))
+
+    def parse(self, chunk):
+        return dict(line.split(': ', 1) for line in chunk.decode('utf-8').strip().split('\n'))
+
+    def test_recording_a_change_publishes_it(self):
+        subscription = get_hub().subscribe(question_channel(self.question.id))
+        try:
+            Answer.objects.create(content='Some answer', question=self.question, author=self.account)
+            self.assertEqual(subscription.get(0), latest_cursor(self.question.id))
+        finally:
+            subscription.close()
+
+    def test_streams_new_answers(self):
+        self.client.login(username='Andrew', password='homm1994')
+        request = self.client.get('/').wsgi_request
+        events = question_events(request, self.question.id, latest_cursor(self.question.id), timeout=5)
+        self.assertEqual(next(events), b'retry: 1000\n\n')
+        answer = Answer.objects.create(content='Some answer', question=self.question, author=self.account)
+        event = self.parse(next(events))
+        self.assertEqual(list(events), [])
+        self.assertEqual(event['event'], 'answer')
+        self.assertEqual(event['id'], str(latest_cursor(self.question.id)))
+        self.assertEqual(json.loads(event['data'])['id'], answer.id)
+
+    @override_settings(QUESTIONS_EVENTS_TIMEOUT=0)
+    def test_view_streams_changes_since_cursor(self):
+        self.client.login(username='Andrew', password='homm1994')
+        cursor = latest_cursor(self.question.id)
+        answer = Answer.objects.create(content='Some answer', question=self.question, author=self.account)
+        answer_id = answer.id
+        answer.delete()
+        response = self.client.get(self.url, HTTP_LAST_EVENT_ID=str(cursor))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = list(response.streaming_content)
+        self.assertEqual(chunks[0], b'retry: 1000\n\n')
+        events = [self.parse(chunk) for chunk in chunks[1:]]
+        self.assertEqual([event['event'] for event in events], ['delete'])
+        self.assertEqual(json.loads(events[0]['data']), {'type': 'answer', 'id': answer_id})
+
+    def test_timeout_moves_the_cursor(self):
+        self.client.login(username='Andrew', password='homm1994')
+        request = self.client.get('/').wsgi_request
+        cursor = latest_cursor(self.question.id)
+        events = list(question_events(request, self.question.id, cursor, timeout=0))
+        self.assertEqual(events, [b'retry: 1000\n\n', ('id: %d\n\n' % cursor).encode('ascii')])
+
+    def test_stale_cursor_gets_resync_event(self):
+        self.client.login(username='Andrew', password='homm1994')
+        request = self.client.get('/').wsgi_request
+        cursor = latest_cursor(self.question.id)
+        Answer.objects.create(content='Some answer', question=self.question, author=self.account)
+        Answer.objects.create(content='Other answer', question=self.question, author=self.account)
+        QuestionChange.objects.update(created_at=timezone.now() - timedelta(days=8))
+        prune_changes(7)
+        events = list(question_events(request, self.question.id, cursor, timeout=5))
+        self.assertEqual(len(events), 2)
+        event = self.parse(events[1])
+        self.assertEqual(event['event'], 'resync')
+        self.assertEqual(event['id'], str(latest_cursor(self.question.id)))
+
+    def test_view_rejects_invalid_cursor(self):
+        self.client.login(username='Andrew', password='homm1994')
+        self.assertEqual(self.client.get(self.url, {'since': 'x'}).status_code, 400)
+
+    def test_view_returns_403_to_anon_user(self):
+        self.assertEqual(self.client.get(self.url).status_code, 403)
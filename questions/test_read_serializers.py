@@ -0,0 +1,93 @@
+from django.contrib.auth.models import AnonymousUser
+from django.test import TestCase
+from django.core.management import call_command
+from django.utils.six import StringIO
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+from rest_framework.request import Request
+from account.models import Account
+from .models import Tag, Question, Answer, Comment, Like
+from .serializers import QuestionSerializer, AnswerSerializer, NestedCommentSerializer, ForQuestionsAccountSerializer
+from .read_serializers import (
+    QuestionReadSerializer,
+    AnswerReadSerializer,
+    CommentReadSerializer,
+    AccountReadSerializer,
+)
+
+
+class ReadSerializersTest(TestCase):
+
+    def setUp(self):
+        self.account = Account.objects.create_user(
+            username='Andrew',
+            email='pop@tut.by',
+            password='homm1994',
+            tagline='Tagline   ünïcode'
+        )
+        self.other_account = Account.objects.create_user(
+            username='Other',
+            email='other@tut.by',
+            password='homm1994'
+        )
+        tags = [Tag.objects.create(name='tag%d' % n) for n in range(3)]
+        self.questions = []
+        for n in range(3):
+            question = Question.objects.create(summary='Summary %d' % n, content='Cöntent', author=self.account)
+            question.tags.add(*tags[n:])
+            for m in range(2):
+                answer = Answer.objects.create(content='Answer %d' % m, question=question, author=self.other_account)
+                Comment.objects.create(content='Comment', content_object=answer, author=self.account)
+            Comment.objects.create(content='Comment', content_object=question, author=self.other_account)
+            self.questions.append(question)
+        Question.objects.create(summary='Anonymous', content='Content')
+        Like.objects.create(content_object=self.questions[1], author=self.account)
+        Like.objects.create(content_object=answer, author=self.account)
+        self.request = self.make_request('/')
+
+    def make_request(self, path, user=None):
+        request = Request(APIRequestFactory().get(path))
+        request.user = user or self.account
+        return request
+
+    def assertSameJSON(self, serializer, read_serializer, instance, request=None, **kwargs):
+        context = {'request': request or self.request}
+        self.assertEqual(
+            JSONRenderer().render(read_serializer(instance, context=context, **kwargs).data),
+            JSONRenderer().render(serializer(instance, context=context, **kwargs).data)
+        )
+
+    def test_question(self):
+        self.assertSameJSON(QuestionSerializer, QuestionReadSerializer, self.questions[2], expand_all=True)
+
+    def test_questions_list(self):
+        queryset = Question.objects.order_by('-created_at')
+        self.assertSameJSON(QuestionSerializer, QuestionReadSerializer, queryset, many=True)
+        self.assertSameJSON(QuestionSerializer, QuestionReadSerializer, list(queryset), many=True)
+
+    def test_sparse_and_expanded_questions(self):
+        queryset = Question.objects.order_by('-created_at')
+        for path in ('/?fields=id,summary', '/?expand=answers', '/?fields=id&expand=comments'):
+            self.assertSameJSON(QuestionSerializer, QuestionReadSerializer, queryset, self.make_request(path), many=True)
+
+    def test_anonymous_user(self):
+        request = self.make_request('/?expand=answers,comments', AnonymousUser())
+        self.assertSameJSON(QuestionSerializer, QuestionReadSerializer, Question.objects.all(), request, many=True)
+
+    def test_answers_comments_and_accounts(self):
+        self.assertSameJSON(AnswerSerializer, AnswerReadSerializer, Answer.objects.filter(question=self.questions[0]),
+                            many=True)
+        self.assertSameJSON(NestedCommentSerializer, CommentReadSerializer, Comment.objects.all(), many=True)
+        self.assertSameJSON(ForQuestionsAccountSerializer, AccountReadSerializer, self.account)
+
+    def test_fixed_number_of_queries(self):
+        request = self.make_request('/?expand=answers,comments')
+        # questions, tags, answers, comments, authors, likes, pending like events
+        with self.assertNumQueries(7):
+            QuestionReadSerializer(Question.objects.all(), context={'request': request}, many=True).data
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('benchmark_serializers', questions=2, repeat=1, user='Andrew', stdout=out)
+        self.assertIn('questions (2)', out.getvalue())
+        self.assertIn('answers (2)', out.getvalue())
@@ -0,0 +1,82 @@
+from django.test import TestCase, override_settings
+from django.core.management import call_command
+from django.utils.six import StringIO
+from account.models import Account
+from .models import Question, SearchDocument, SearchPosting
+from .search import analyze, stem, rank, search_questions
+
+
+class AnalysisTest(TestCase):
+
+    def test_stem_strips_suffixes(self):
+        self.assertEqual(stem('running'), stem('run'))
+        self.assertEqual(stem('queries'), stem('query'))
+        self.assertEqual(stem('created'), stem('create'))
+        self.assertEqual(stem('classes'), stem('class'))
+
+    def test_stem_leaves_other_alphabets(self):
+        self.assertEqual(stem('питон'), 'питон')
+
+    def test_analyze_drops_stop_words(self):
+        self.assertEqual(analyze('The Django and the ORM'), ['django', 'orm'])
+
+
+class SearchIndexTest(TestCase):
+
+    def setUp(self):
+        self.account = Account.objects.create_user(
+            username='Andrew',
+            email='pop@tut.by',
+            password='homm1994'
+        )
+        self.django = Question.objects.create(
+            summary='Django queries',
+            content='How to optimize queries in django views',
+            author=self.account
+        )
+        self.python = Question.objects.create(
+            summary='Python packaging',
+            content='How to create a package, django is not involved',
+            author=self.account
+        )
+
+    def test_question_is_indexed_on_save(self):
+        self.assertEqual(SearchDocument.objects.count(), 2)
+        self.assertTrue(SearchPosting.objects.filter(term='django', document=self.django.id).exists())
+
+    def test_index_is_updated_on_change(self):
+        self.python.content = 'Something else'
+        self.python.save()
+        self.assertFalse(SearchPosting.objects.filter(term='django', document=self.python.id).exists())
+
+    def test_index_is_cleaned_on_delete(self):
+        self.django.delete()
+        self.assertEqual(SearchDocument.objects.count(), 1)
+        self.assertFalse(SearchPosting.objects.filter(document=self.django.id).exists())
+
+    def test_rank_orders_by_relevance(self):
+        self.assertEqual(rank('django query'), [self.django.id, self.python.id])
+
+    def test_search_questions_returns_matches(self):
+        self.assertEqual(list(search_questions('packages')), [self.python])
+        self.assertEqual(list(search_questions('nothing matches')), [])
+
+    def test_rank_is_cached_until_the_index_changes(self):
+        self.assertEqual(rank('package'), [self.python.id])
+        SearchPosting.objects.filter(document=self.python.id).delete()
+        self.assertEqual(rank('packages'), [self.python.id])
+        self.python.save()
+        self.assertEqual(rank('package'), [self.python.id])
+        self.python.delete()
+        self.assertEqual(rank('package'), [])
+
+    @override_settings(QUESTIONS_SEARCH_MAX_POSTINGS=1)
+    def test_common_terms_are_capped(self):
+        self.assertEqual(rank('django package'), [self.python.id])
+        self.assertEqual(rank('django'), [self.django.id])
+
+    def test_build_search_index_command(self):
+        SearchDocument.objects.all().delete()
+        call_command('build_search_index', workers=2, chunk_size=1, stdout=StringIO())
+        self.assertEqual(SearchDocument.objects.count(), 2)
+        self.assertEqual(rank('package'), [self.python.id])
@@ -0,0 +1,131 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+from rest_framework.request import Request
+from account.models import Account
+from .models import Question, Answer, Comment, Like
+from .serializers import QuestionSerializer, AnswerSerializer, NestedCommentSerializer, NestedLikeSerializer
+from tost.identity import get_identity_map
+
+
+class AlreadyLikedTest(TestCase):
+
+    def setUp(self):
+        self.account = Account.objects.create_user(
+            username='Andrew',
+            email='pop@tut.by',
+            password='homm1994'
+        )
+        self.question = Question.objects.create(summary='Summary', content='Content', author=self.account)
+        self.answers = [
+            Answer.objects.create(content='Answer %d' % n, question=self.question, author=self.account)
+            for n in range(20)
+        ]
+        Like.objects.create(content_object=self.question, author=self.account)
+        Like.objects.create(content_object=self.answers[3], author=self.account)
+        self.request = Request(APIRequestFactory().get('/'))
+        self.request.user = self.account
+
+    def like_queries(self, queries):
+        return [query for query in queries if '"questions_like"' in query['sql']]
+
+    def test_question_payload_loads_likes_once(self):
+        with CaptureQueriesContext(connection) as context:
+            data = QuestionSerializer(self.question, context={'request': self.request}, expand_all=True).data
+        self.assertTrue(data['already_liked'])
+        self.assertEqual([answer['already_liked'] for answer in data['answers']],
+                         [n == 3 for n in range(20)])
+        self.assertEqual(len(self.like_queries(context.captured_queries)), 1)
+
+    def test_answers_list_payload(self):
+        queryset = Answer.objects.filter(question=self.question)
+        data = AnswerSerializer(queryset, many=True, context={'request': self.request}).data
+        self.assertEqual([answer['already_liked'] for answer in data], [n == 3 for n in range(20)])
+
+
+class GenericTargetsTest(TestCase):
+
+    def setUp(self):
+        self.account = Account.objects.create_user(
+            username='Andrew',
+            email='pop@tut.by',
+            password='homm1994'
+        )
+        self.question = Question.objects.create(summary='Summary', content='Content', author=self.account)
+        self.answers = [
+            Answer.objects.create(content='Answer %d' % n, question=self.question, author=self.account)
+            for n in range(5)
+        ]
+        for target in [self.question] + self.answers:
+            Comment.objects.create(content='Comment', content_object=target, author=self.account)
+            Like.objects.create(content_object=target, author=self.account)
+        self.request = Request(APIRequestFactory().get('/'))
+        self.request.user = self.account
+
+    def test_renders_targets_without_loading_them(self):
+        expected = ['Question: %d' % self.question.id] + ['Answer: %d' % answer.id for answer in self.answers]
+        # rows, the author being the requesting user is taken from the identity map
+        with self.assertNumQueries(1):
+            comments = NestedCommentSerializer(Comment.objects.order_by('id'), many=True,
+                                               context={'request': self.request}).data
+        # rows, authors
+        with self.assertNumQueries(2):
+            likes = NestedLikeSerializer(Like.objects.order_by('id'), many=True).data
+        self.assertEqual([comment['content_object'] for comment in comments], expected)
+        self.assertEqual([like['content_object'] for like in likes], expected)
+        self.assertEqual(comments[0]['author']['username'], 'Andrew')
+
+
+class IdentityMapTest(TestCase):
+
+    def setUp(self):
+        self.account = Account.objects.create_user(
+            username='Andrew',
+            email='pop@tut.by',
+            password='homm1994'
+        )
+        self.other_account = Account.objects.create_user(
+            username='Other',
+            email='other@tut.by',
+            password='homm1994'
+        )
+        self.question = Question.objects.create(summary='Summary', content='Content', author=self.other_account)
+        for n in range(5):
+            answer = Answer.objects.create(content='Answer %d' % n, question=self.question,
+                                           author=self.account if n % 2 else self.other_account)
+            Comment.objects.create(content='Comment', content_object=answer, author=self.other_account)
+        Comment.objects.create(content='Comment', content_object=self.question, author=self.account)
+        self.request = Request(APIRequestFactory().get('/'))
+        self.request.user = self.account
+
+    def account_queries(self, queries):
+        return [query for query in queries if 'FROM "account_account"' in query['sql']]
+
+    def test_loads_every_author_once(self):
+        question = Question.objects.get(pk=self.question.pk)
+        with CaptureQueriesContext(connection) as context:
+            data = QuestionSerializer(question, context={'request': self.request}, expand_all=True).data
+        self.assertEqual(len(self.account_queries(context.captured_queries)), 1)
+        self.assertEqual(data['author']['username'], 'Other')
+        self.assertEqual([answer['author']['username'] for answer in data['answers']],
+                         ['Other', 'Andrew', 'Other', 'Andrew', 'Other'])
+        self.assertEqual([answer['my'] for answer in data['answers']], [False, True, False, True, False])
+        identity_map = get_identity_map(self.request)
+        self.assertEqual(identity_map.misses, 1)
+        self.assertGreater(identity_map.hits, 0)
+
+    def test_shares_instances(self):
+        identity_map = get_identity_map(self.request)
+        answers = list(Answer.objects.all())
+        with self.assertNumQueries(1):
+            identity_map.attach(answers, 'question')
+            identity_map.attach(answers, 'question')
+        with self.assertNumQueries(0):
+            question = identity_map.get(Question, str(self.question.pk))
+        self.assertTrue(all(answer.question is question for answer in answers))
+
+    def test_get_ignores_malformed_pks(self):
+        identity_map = get_identity_map(self.request)
+        with self.assertNumQueries(0):
+            self.assertIsNone(identity_map.get(Question, 'abc'))
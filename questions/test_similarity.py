@@ -0,0 +1,56 @@
+from django.test import TestCase
+from django.core.urlresolvers import reverse
+from django.core.management import call_command
+from django.utils.six import StringIO
+from account.models import Account
+from .models import Tag, Question, SimilarQuestion
+
+
+class SimilarQuestionsTest(TestCase):
+
+    def setUp(self):
+        self.account = Account.objects.create_user(
+            username='Andrew',
+            email='pop@tut.by',
+            password='homm1994'
+        )
+        self.python, self.django, self.orm = [Tag.objects.create(name=name) for name in ('python', 'django', 'orm')]
+        self.first = self.create_question(self.python, self.django, self.orm)
+        self.second = self.create_question(self.python, self.django)
+        self.third = self.create_question(self.python)
+
+    def create_question(self, *tags):
+        question = Question.objects.create(summary='Summary', content='Content', author=self.account)
+        question.tags.add(*tags)
+        return question
+
+    def similar(self, question):
+        return list(SimilarQuestion.objects.filter(question=question).order_by('-score')
+                    .values_list('similar_id', flat=True))
+
+    def test_neighbours_are_ordered_by_tag_overlap(self):
+        self.assertEqual(self.similar(self.first), [self.second.id, self.third.id])
+        self.assertEqual(self.similar(self.third), [self.second.id, self.first.id])
+
+    def test_refreshed_when_tags_change(self):
+        self.second.tags.clear()
+        self.assertEqual(self.similar(self.second), [])
+        self.assertEqual(self.similar(self.first), [self.third.id])
+        self.orm.questions.add(self.third)
+        self.assertEqual(self.similar(self.first)[0], self.third.id)
+
+    def test_refreshed_when_question_deleted(self):
+        self.second.delete()
+        self.assertEqual(self.similar(self.first), [self.third.id])
+
+    def test_rebuild_similar_questions_command(self):
+        expected = self.similar(self.first)
+        SimilarQuestion.objects.all().delete()
+        call_command('rebuild_similar_questions', stdout=StringIO())
+        self.assertEqual(self.similar(self.first), expected)
+        self.assertEqual(SimilarQuestion.objects.count(), 6)
+
+    def test_detail_page_shows_neighbours(self):
+        self.client.login(username='Andrew', password='homm1994')
+        response = self.client.get(reverse('questions:questions_detail', args=(self.first.id,)))
+        self.assertEqual(response.context['similar'], [self.second, self.third])
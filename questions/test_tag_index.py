@@ -0,0 +1,63 @@
+from django.test import TestCase
+from django.core.management import call_command
+from django.utils.six import StringIO
+from account.models import Account
+from .forms import AddQuestionForm
+from .models import Tag, TaggedQuestion, Like
+
+
+class TagIndexTest(TestCase):
+
+    def setUp(self):
+        self.account = Account.objects.create_user(
+            username='Andrew',
+            email='pop@tut.by',
+            password='homm1994'
+        )
+        self.python = Tag.objects.create(name='python')
+        self.django = Tag.objects.create(name='django')
+        form = AddQuestionForm({
+            'summary': 'Some summary',
+            'content': 'Some content',
+            'tags': [self.python.id, self.django.id],
+        })
+        self.question = form.save(commit=False)
+        self.question.author = self.account
+        self.question.save()
+        form.save_m2m()
+
+    def count(self, tag):
+        return Tag.objects.get(pk=tag.id).questions_count
+
+    def test_save_m2m_adds_entries(self):
+        self.assertEqual(TaggedQuestion.objects.filter(question=self.question).count(), 2)
+        self.assertEqual(self.count(self.python), 1)
+        self.assertEqual(self.count(self.django), 1)
+
+    def test_remove_and_reverse_add(self):
+        self.question.tags.remove(self.django)
+        self.assertEqual(self.count(self.django), 0)
+        self.django.questions.add(self.question)
+        self.assertEqual(self.count(self.django), 1)
+        self.assertTrue(TaggedQuestion.objects.filter(tag=self.django, question=self.question).exists())
+
+    def test_clear(self):
+        self.question.tags.clear()
+        self.assertFalse(TaggedQuestion.objects.exists())
+        self.assertEqual(self.count(self.python), 0)
+
+    def test_question_deletion(self):
+        self.question.delete()
+        self.assertFalse(TaggedQuestion.objects.exists())
+        self.assertEqual(self.count(self.python), 0)
+
+    def test_entries_follow_score(self):
+        Like.objects.create(content_object=self.question, author=self.account)
+        self.assertEqual(TaggedQuestion.objects.get(tag=self.python).score, 1)
+
+    def test_rebuild_tag_index_command(self):
+        TaggedQuestion.objects.all().delete()
+        Tag.objects.update(questions_count=0)
+        call_command('rebuild_tag_index', stdout=StringIO())
+        self.assertEqual(TaggedQuestion.objects.count(), 2)
+        self.assertEqual(self.count(self.python), 1)
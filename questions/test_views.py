@@ -1,9 +1,14 @@
-from django.test import TestCase
+import json
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection, DatabaseError
 from django.core.urlresolvers import reverse
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.test import APITestCase, APIRequestFactory, force_authenticate
 from account.models import Account
 from .models import Tag, Question, Answer, Comment, Like
+from .views import QuestionsViewSet, AnswersViewSet, BatchView
+from .likes import compact_like_events
 
 
 class BaseQuestionsListViewTest(object):
@@ -46,10 +51,28 @@ class LatestQuestionsViewTest(BaseQuestionsListViewTest, TestCase):
 class BestQuestionsListViewTest(BaseQuestionsListViewTest, TestCase):
     url = reverse('questions:questions_best')
 
+    def test_orders_questions_by_likes(self):
+        account = self.create_user()
+        plain = Question.objects.create(summary='Plain', content='Plain', author=account)
+        liked = Question.objects.create(summary='Liked', content='Liked', author=account)
+        Like.objects.create(content_object=liked, author=account)
+        self.client.login(username='Andrew', password='homm1994')
+        response = self.client.get(self.url)
+        self.assertEqual(list(response.context['questions']), [liked, plain])
+
 
 class UnansweredQuestionsListViewTest(BaseQuestionsListViewTest, TestCase):
     url = reverse('questions:questions_unanswered')
 
+    def test_excludes_answered_questions(self):
+        account = self.create_user()
+        unanswered = Question.objects.create(summary='How to?', content='How to?', author=account)
+        answered = Question.objects.create(summary='How to?', content='How to?', author=account)
+        Answer.objects.create(content='Like this', question=answered, author=account)
+        self.client.login(username='Andrew', password='homm1994')
+        response = self.client.get(self.url + '?q=how')
+        self.assertEqual(list(response.context['questions']), [unanswered])
+
 
 class ByTagIdQuestionsListViewTest(BaseQuestionsListViewTest, TestCase):
     url = reverse('questions:questions_by_tag_id', args=(1,))        
@@ -57,6 +80,39 @@ class ByTagIdQuestionsListViewTest(BaseQuestionsListViewTest, TestCase):
     def setUp(self):
         Tag.objects.create(name='test_tag')
 
+    def test_lists_tagged_questions(self):
+        account = self.create_user()
+        tagged = Question.objects.create(summary='Tagged', content='Tagged', author=account)
+        Question.objects.create(summary='Other', content='Other', author=account)
+        tagged.tags.add(Tag.objects.get(pk=1))
+        self.client.login(username='Andrew', password='homm1994')
+        response = self.client.get(self.url)
+        self.assertEqual(list(response.context['questions']), [tagged])
+        self.assertEqual(response.context['title'], 'Questions tagged with #test_tag (1)')
+
+
+class BestByTagIdQuestionsListViewTest(BaseQuestionsListViewTest, TestCase):
+    url = reverse('questions:questions_by_tag_id_best', args=(1,))
+
+    def setUp(self):
+        Tag.objects.create(name='test_tag')
+
+    def test_orders_tagged_questions_by_likes(self):
+        account = self.create_user()
+        tag = Tag.objects.get(pk=1)
+        questions = [Question.objects.create(summary='Tagged', content='Tagged', author=account) for n in range(8)]
+        Question.objects.create(summary='Other', content='Other', author=account)
+        for question in questions:
+            question.tags.add(tag)
+        Like.objects.create(content_object=questions[2], author=account)
+        self.client.login(username='Andrew', password='homm1994')
+        response = self.client.get(self.url)
+        expected = [questions[2]] + [question for question in reversed(questions) if question != questions[2]]
+        self.assertEqual(list(response.context['questions']), expected[:6])
+        self.assertEqual(response.context['title'], 'Best questions tagged with #test_tag (8)')
+        response = self.client.get(self.url + '?' + response.context['pager'][1]['query'])
+        self.assertEqual(list(response.context['questions']), expected[6:])
+
 
 class QuestionsDetailViewTest(TestCase):
 
@@ -188,6 +244,34 @@ class QuestionsViewSetTest(APITestCase):
         self.assertEqual(response.data[0]['summary'], self.question.summary)
         self.assertEqual(response.data[0]['content'], self.question.content)
 
+    def test_list_leaves_out_nested_answers_and_comments(self):
+        self.client.force_authenticate(user=self.account)
+        response = self.client.get(reverse('questions:questions-list'))
+        self.assertNotIn('answers', response.data[0])
+        self.assertNotIn('comments', response.data[0])
+
+    def test_list_expands_answers_on_request(self):
+        Answer.objects.create(content='Some answer', question=self.question, author=self.account)
+        self.client.force_authenticate(user=self.account)
+        response = self.client.get(reverse('questions:questions-list') + '?expand=answers')
+        self.assertEqual(response.data[0]['answers'][0]['content'], 'Some answer')
+        self.assertNotIn('comments', response.data[0])
+
+    def test_list_returns_requested_fields_only(self):
+        self.client.force_authenticate(user=self.account)
+        response = self.client.get(reverse('questions:questions-list') + '?fields=id,summary')
+        self.assertEqual(set(response.data[0]), {'id', 'summary'})
+
+    def test_list_is_cursor_paginated(self):
+        for n in range(20):
+            Question.objects.create(summary='Question %d' % n, content='Content', author=self.account)
+        self.client.force_authenticate(user=self.account)
+        response = self.client.get(reverse('questions:questions-list'))
+        self.assertEqual(len(response.data), 20)
+        next_url = response['Link'].split(';')[0].strip('<>')
+        response = self.client.get(next_url)
+        self.assertEqual([question['id'] for question in response.data], [self.question.id])
+
     def test_list_returns_403_to_anon_user_post(self):
         response = self.client.post(reverse('questions:questions-list'), {
             'summary': 'Question heading',
@@ -214,6 +298,24 @@ class QuestionsViewSetTest(APITestCase):
         self.assertEqual(questions.last().summary, 'Question heading')
         self.assertEqual(questions.last().content, 'Question content')
 
+    def test_fields_param_keeps_submitted_data(self):
+        self.client.force_authenticate(user=self.account)
+        response = self.client.post(reverse('questions:questions-list') + '?fields=summary', {
+            'summary': 'Question heading',
+            'content': 'Question content',
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        question = Question.objects.get(summary='Question heading')
+        self.assertEqual(question.content, 'Question content')
+        response = self.client.put(reverse('questions:questions-detail', args=(question.id,)) + '?fields=content', {
+            'summary': 'Another question heading',
+            'content': 'Another question content',
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        question = Question.objects.get(pk=question.id)
+        self.assertEqual(question.summary, 'Another question heading')
+        self.assertEqual(question.content, 'Another question content')
+
     def test_list_returns_400_after_invalid_post(self):
         self.client.force_authenticate(user=self.account)
         response = self.client.post(reverse('questions:questions-list'), {
@@ -378,6 +480,43 @@ class QuestionsViewSetTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertEqual(Like.objects.count(), 0)
 
+    def test_like_it_returns_400_if_already_liked(self):
+        Like.objects.create(content_object=self.question, author=self.foreign_account)
+        self.client.force_authenticate(user=self.foreign_account)
+        response = self.client.post(
+            reverse('questions:questions-detail', args=(self.question.id,)) + 'like_it/'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Like.objects.count(), 1)
+
+    def test_dislike_it_returns_404_if_not_liked(self):
+        self.client.force_authenticate(user=self.foreign_account)
+        response = self.client.delete(
+            reverse('questions:questions-detail', args=(self.question.id,)) + 'dislike_it/'
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_toggle_like_returns_likes_count(self):
+        self.client.force_authenticate(user=self.foreign_account)
+        url = reverse('questions:questions-detail', args=(self.question.id,)) + 'toggle_like/'
+        response = self.client.post(url)
+        self.assertEqual(response.data, {'liked': True, 'likes_count': 1})
+        response = self.client.post(url)
+        self.assertEqual(response.data, {'liked': False, 'likes_count': 0})
+        self.assertEqual(Like.objects.count(), 0)
+
+    @override_settings(QUESTIONS_HOT_LIKES=1000)
+    def test_toggle_like_of_hot_question_returns_likes_count(self):
+        Question.objects.filter(pk=self.question.id).update(likes_count=5000)
+        self.client.force_authenticate(user=self.foreign_account)
+        url = reverse('questions:questions-detail', args=(self.question.id,)) + 'toggle_like/'
+        for liked, likes_count in ((True, 5001), (False, 5000), (True, 5001)):
+            self.assertEqual(self.client.post(url).data, {'liked': liked, 'likes_count': likes_count})
+        compact_like_events()
+        self.assertEqual(Question.objects.get(pk=self.question.id).likes_count, 5001)
+        for liked, likes_count in ((False, 5000), (True, 5001), (False, 5000)):
+            self.assertEqual(self.client.post(url).data, {'liked': liked, 'likes_count': likes_count})
+
 
 class AnswerViewSetTest(APITestCase):
 
@@ -607,3 +746,369 @@ class AnswerViewSetTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertEqual(Like.objects.count(), 0)
 
+    def test_toggle_like_returns_likes_count(self):
+        Like.objects.create(content_object=self.answer, author=self.account)
+        self.client.force_authenticate(user=self.foreign_account)
+        url = reverse('questions:questions-detail', args=(self.question.id,)) + 'answers/%d/' % self.answer.id + 'toggle_like/'
+        response = self.client.post(url)
+        self.assertEqual(response.data, {'liked': True, 'likes_count': 2})
+        response = self.client.post(url)
+        self.assertEqual(response.data, {'liked': False, 'likes_count': 1})
+
+
+
+class QuestionsDetailViewQueriesTest(TestCase):
+
+    def setUp(self):
+        self.account = Account.objects.create_user(
+            username='Andrew',
+            email='pop@tut.by',
+            password='homm1994'
+        )
+        tags = [Tag.objects.create(name='tag%d' % n) for n in range(5)]
+        self.question = Question.objects.create(summary='Some title', content='Some text', author=self.account)
+        self.question.tags.add(*tags)
+        for n in range(6):
+            similar = Question.objects.create(summary='Similar %d' % n, content='Some text', author=self.account)
+            similar.tags.add(*tags[:n + 1])
+            Answer.objects.create(content='Answer %d' % n, question=self.question, author=self.account)
+            Comment.objects.create(content='Comment %d' % n, content_object=self.question, author=self.account)
+
+    def test_renders_with_fixed_number_of_queries(self):
+        self.client.login(username='Andrew', password='homm1994')
+        # user (cached from then on, the session is read from the cache),
+        # etag (question with answer authors, comment authors, similar versions),
+        # question with author, tags, similar questions
+        with self.assertNumQueries(7):
+            response = self.client.get(reverse('questions:questions_detail', args=(self.question.id,)))
+        self.assertEqual(len(response.context['similar']), 4)
+
+
+class ConditionalGetTest(APITestCase):
+
+    def setUp(self):
+        self.account = Account.objects.create_user(
+            username='Andrew',
+            email='pop@tut.by',
+            password='homm1994'
+        )
+        self.question = Question.objects.create(summary='Some title', content='Some text', author=self.account)
+        self.answer = Answer.objects.create(content='Some answer', question=self.question, author=self.account)
+
+    def assertRevalidates(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        Comment.objects.create(content='Some comment', content_object=self.answer, author=self.account)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_detail_page(self):
+        self.client.login(username='Andrew', password='homm1994')
+        self.assertRevalidates(reverse('questions:questions_detail', args=(self.question.id,)))
+
+    def test_question_payload(self):
+        self.client.force_authenticate(user=self.account)
+        self.assertRevalidates(reverse('questions:questions-detail', args=(self.question.id,)))
+
+    def test_answers_payload(self):
+        self.client.force_authenticate(user=self.account)
+        self.assertRevalidates(reverse('questions:answers-list', args=(self.question.id,)))
+
+    def test_not_modified_payload_is_not_serialized(self):
+        self.client.force_authenticate(user=self.account)
+        url = reverse('questions:questions-detail', args=(self.question.id,))
+        etag = self.client.get(url)['ETag']
+        # etag (question with answer authors, comment authors, pending like events)
+        with self.assertNumQueries(3):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def assertChangesETag(self, change):
+        self.client.force_authenticate(user=self.account)
+        url = reverse('questions:questions-detail', args=(self.question.id,))
+        etag = self.client.get(url)['ETag']
+        change()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_answer_author_edit_changes_etag(self):
+        self.question.author = None
+        self.question.save()
+        self.assertChangesETag(lambda: self.account.save())
+
+    def test_comment_author_edit_changes_etag(self):
+        other_account = Account.objects.create_user(
+            username='Other',
+            email='other@tut.by',
+            password='homm1994'
+        )
+        Comment.objects.create(content='Some comment', content_object=self.answer, author=other_account)
+        self.assertChangesETag(lambda: other_account.save())
+
+    def test_tags_change_etag(self):
+        tag = Tag.objects.create(name='tag')
+        self.assertChangesETag(lambda: self.question.tags.add(tag))
+        self.assertChangesETag(lambda: tag.questions.remove(self.question))
+        self.question.tags.add(tag)
+
+        def rename():
+            tag.name = 'renamed'
+            tag.save()
+        self.assertChangesETag(rename)
+
+    def test_etag_differs_between_users(self):
+        other_account = Account.objects.create_user(
+            username='Other',
+            email='other@tut.by',
+            password='homm1994'
+        )
+        url = reverse('questions:questions-detail', args=(self.question.id,))
+        self.client.force_authenticate(user=other_account)
+        etag = self.client.get(url)['ETag']
+        self.client.force_authenticate(user=self.account)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_missing_question(self):
+        self.client.force_authenticate(user=self.account)
+        response = self.client.get(reverse('questions:questions-detail', args=(self.question.id + 1,)))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class BatchViewTest(APITestCase):
+
+    def setUp(self):
+        self.account = Account.objects.create_user(
+            username='Andrew',
+            email='pop@tut.by',
+            password='homm1994'
+        )
+        self.foreign_account = Account.objects.create_user(
+            username='Other',
+            email='other@tut.by',
+            password='homm1994'
+        )
+        self.question = Question.objects.create(summary='Some title', content='Some text', author=self.account)
+        self.answer = Answer.objects.create(content='Some answer', question=self.question, author=self.foreign_account)
+        self.url = reverse('questions:batch')
+
+    def test_returns_403_to_anon_user(self):
+        response = self.client.post(self.url, [], format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_runs_operations(self):
+        self.client.force_authenticate(user=self.account)
+        response = self.client.post(self.url, [
+            {'op': 'like', 'question': self.question.id},
+            {'op': 'like', 'question': self.question.id, 'answer': self.answer.id},
+            {'op': 'like', 'question': self.question.id},
+            {'op': 'comment', 'question': self.question.id, 'answer': self.answer.id, 'content': 'Some comment'},
+            {'op': 'mark_as_solution', 'question': self.question.id, 'answer': self.answer.id},
+            {'op': 'unlike', 'question': self.question.id},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([result['status'] for result in response.data], [201, 201, 400, 201, 200, 204])
+        self.assertEqual(response.data[3]['data']['content'], 'Some comment')
+        self.assertEqual(Like.objects.count(), 1)
+        self.assertEqual(Comment.objects.get().content_object, self.answer)
+        self.assertTrue(Answer.objects.get(pk=self.answer.id).solution)
+        question = Question.objects.get(pk=self.question.id)
+        self.assertEqual((question.likes_count, question.comments_count), (0, 0))
+        self.assertEqual(Answer.objects.get(pk=self.answer.id).likes_count, 1)
+
+    def test_reports_failing_operations(self):
+        self.client.force_authenticate(user=self.foreign_account)
+        response = self.client.post(self.url, [
+            {'op': 'mark_as_solution', 'question': self.question.id, 'answer': self.answer.id},
+            {'op': 'like', 'question': self.question.id + 1},
+            {'op': 'like', 'question': self.question.id, 'answer': 'x'},
+            {'op': 'delete', 'question': self.question.id},
+            {'op': 'comment', 'question': self.question.id},
+        ], format='json')
+        self.assertEqual([result['status'] for result in response.data], [403, 404, 404, 400, 400])
+        self.assertFalse(Answer.objects.get(pk=self.answer.id).solution)
+
+    def test_failing_operation_is_rolled_back_alone(self):
+
+        class FailingBatchView(BatchView):
+            operations = BatchView.operations + ('fail',)
+
+            def fail(self, request, operation, question, answer):
+                Comment.objects.create(content='Lost comment', content_object=question, author=request.user)
+                raise DatabaseError('Deadlock')
+
+        request = APIRequestFactory().post(self.url, [
+            {'op': 'like', 'question': self.question.id},
+            {'op': 'fail', 'question': self.question.id},
+            {'op': 'comment', 'question': self.question.id, 'content': 'Some comment'},
+        ], format='json')
+        force_authenticate(request, user=self.account)
+        response = FailingBatchView.as_view()(request)
+        self.assertEqual([result['status'] for result in response.data], [201, 500, 201])
+        self.assertEqual(Like.objects.count(), 1)
+        self.assertEqual(list(Comment.objects.values_list('content', flat=True)), ['Some comment'])
+        self.assertEqual(Question.objects.get(pk=self.question.id).comments_count, 1)
+
+    def test_rejects_too_many_operations(self):
+        self.client.force_authenticate(user=self.account)
+        response = self.client.post(self.url, [{'op': 'like', 'question': self.question.id}] * 51, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Like.objects.count(), 0)
+
+    def test_loads_targets_once(self):
+        self.client.force_authenticate(user=self.account)
+        operations = [
+            {'op': 'comment', 'question': self.question.id, 'answer': self.answer.id, 'content': 'Comment %d' % n}
+            for n in range(10)
+        ]
+        with CaptureQueriesContext(connection) as context:
+            self.client.post(self.url, operations, format='json')
+        selects = [query['sql'] for query in context.captured_queries
+                   if 'SELECT' in query['sql'] and 'UPDATE' not in query['sql']]
+        self.assertEqual(len([sql for sql in selects if 'FROM "questions_question"' in sql]), 1)
+        self.assertEqual(len([sql for sql in selects if 'FROM "questions_answer"' in sql]), 1)
+        self.assertEqual(Comment.objects.count(), 10)
+
+
+class StreamingListTest(APITestCase):
+
+    def setUp(self):
+        self.account = Account.objects.create_user(
+            username='Andrew',
+            email='pop@tut.by',
+            password='homm1994'
+        )
+        self.question = Question.objects.create(summary='Some title', content='Some text', author=self.account)
+        for n in range(5):
+            answer = Answer.objects.create(content='Answer %d' % n, question=self.question, author=self.account)
+            Comment.objects.create(content='Comment %d' % n, content_object=answer, author=self.account)
+            Question.objects.create(summary='Question %d' % n, content='Some text', author=self.account)
+        Like.objects.create(content_object=answer, author=self.account)
+        self.client.force_authenticate(user=self.account)
+        self.chunk_sizes = AnswersViewSet.stream_chunk_size, QuestionsViewSet.stream_chunk_size
+        AnswersViewSet.stream_chunk_size = QuestionsViewSet.stream_chunk_size = 2
+
+    def tearDown(self):
+        AnswersViewSet.stream_chunk_size, QuestionsViewSet.stream_chunk_size = self.chunk_sizes
+
+    def streamed(self, url):
+        response = self.client.get(url, {'stream': 'true'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        return json.loads(b''.join(response.streaming_content).decode('utf-8'))
+
+    def test_streams_answers(self):
+        url = reverse('questions:answers-list', args=(self.question.id,))
+        data = self.streamed(url)
+        self.assertEqual(data, json.loads(json.dumps(self.client.get(url).data)))
+        self.assertEqual([answer['already_liked'] for answer in data], [False] * 4 + [True])
+        self.assertEqual(data[0]['comments'][0]['content'], 'Comment 0')
+
+    def test_streams_all_questions(self):
+        data = self.streamed(reverse('questions:questions-list'))
+        self.assertEqual(len(data), 6)
+        self.assertEqual(data[0]['summary'], 'Question 4')
+
+
+class CommentsViewSetTest(APITestCase):
+
+    def setUp(self):
+        self.account = Account.objects.create_user(
+            username='Andrew',
+            email='pop@tut.by',
+            password='homm1994'
+        )
+        self.other_account = Account.objects.create_user(
+            username='Other',
+            email='other@tut.by',
+            password='homm1994'
+        )
+        self.question = Question.objects.create(summary='Some title', content='Some text', author=self.account)
+        self.answer = Answer.objects.create(content='Some answer', question=self.question, author=self.account)
+        self.comments = []
+        for n in range(5):
+            self.comments.append(Comment.objects.create(
+                content='Comment %d' % n,
+                content_object=self.question,
+                author=self.account if n % 2 else self.other_account
+            ))
+        self.answer_comment = Comment.objects.create(content='Answer comment', content_object=self.answer,
+                                                     author=self.account)
+        self.url = reverse('questions:comments-list')
+        self.client.force_authenticate(user=self.account)
+
+    def ids(self, response):
+        return [comment['id'] for comment in response.data]
+
+    def test_filters_by_target(self):
+        response = self.client.get(self.url, {'question': self.question.id})
+        self.assertEqual(self.ids(response), [comment.id for comment in self.comments])
+        response = self.client.get(self.url, {'answer': self.answer.id})
+        self.assertEqual(self.ids(response), [self.answer_comment.id])
+
+    def test_filters_by_author(self):
+        response = self.client.get(self.url, {'question': self.question.id, 'author': self.account.id})
+        self.assertEqual(self.ids(response), [self.comments[1].id, self.comments[3].id])
+
+    def test_filters_by_created_at_range(self):
+        Comment.objects.filter(pk=self.comments[0].pk).update(created_at='2015-01-01T00:00:00Z')
+        Comment.objects.filter(pk=self.comments[1].pk).update(created_at='2015-02-01T00:00:00Z')
+        response = self.client.get(self.url, {'created_after': '2015-01-15', 'created_before': '2015-03-01T00:00:00'})
+        self.assertEqual(self.ids(response), [self.comments[1].id])
+
+    def test_rejects_invalid_filters(self):
+        for params in ({'question': 'x'}, {'author': '-1'}, {'created_after': '2015-13-45'}):
+            self.assertEqual(self.client.get(self.url, params).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_paginates_with_a_fixed_number_of_queries(self):
+        response = self.client.get(self.url, {'question': self.question.id})
+        self.assertEqual(len(response.data), 5)
+        self.assertNotIn('Link', response)
+        for n in range(20):
+            Comment.objects.create(content='More %d' % n, content_object=self.question, author=self.account)
+        # comments with authors
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {'question': self.question.id})
+        self.assertEqual(self.ids(response)[:5], [comment.id for comment in self.comments])
+        self.assertIn('rel="next"', response['Link'])
+        with self.assertNumQueries(1):
+            response = self.client.get(response['Link'][1:response['Link'].index('>')])
+        self.assertEqual([comment['content'] for comment in response.data],
+                         ['More %d' % n for n in range(15, 20)])
+
+
+class IdentityMapMiddlewareTest(APITestCase):
+
+    def setUp(self):
+        self.account = Account.objects.create_user(
+            username='Andrew',
+            email='pop@tut.by',
+            password='homm1994'
+        )
+        self.question = Question.objects.create(summary='Some title', content='Some text', author=self.account)
+        self.answer = Answer.objects.create(content='Some answer', question=self.question, author=self.account)
+        self.url = reverse('questions:answers-detail', args=(self.question.id, self.answer.id))
+        self.client.force_authenticate(user=self.account)
+
+    def test_reports_hits_and_misses_in_debug(self):
+        with self.settings(DEBUG=True):
+            response = self.client.get(self.url)
+        # the question is loaded, the answer's question and author are shared
+        self.assertEqual(response['X-Identity-Map'], 'hits=2; misses=1')
+        self.assertEqual(response.data['author']['username'], 'Andrew')
+        self.assertNotIn('X-Identity-Map', self.client.get(self.url))
+
+    def test_mark_as_solution_loads_question_once(self):
+        # question, answer, the update with its signal handlers
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.patch(self.url + 'mark_as_solution/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        question_selects = [query for query in context.captured_queries
+                            if 'FROM "questions_question"' in query['sql'] and 'SELECT' in query['sql']
+                            and 'UPDATE' not in query['sql']]
+        self.assertEqual(len(question_selects), 1)
@@ -9,8 +9,12 @@ urlpatterns = [
     url(r'^best/$', views.BestQuestionsListView.as_view(), name='questions_best'),
     url(r'^unanswered/$', views.UnansweredQuestionsListView.as_view(), name='questions_unanswered'),
     url(r'^bytag/(?P<pk>[0-9]+)/$', views.ByTagIdQuestionsListView.as_view(), name='questions_by_tag_id'),
+    url(r'^bytag/(?P<pk>[0-9]+)/best/$', views.BestByTagIdQuestionsListView.as_view(),
+        name='questions_by_tag_id_best'),
     url(r'^(?P<pk>[0-9]+)/$', views.QuestionsDetailView.as_view(), name='questions_detail'),
+    url(r'^(?P<pk>[0-9]+)/events/$', views.QuestionEventsView.as_view(), name='questions_events'),
     url(r'^add_question/$', views.AddQuestionView.as_view(), name='add_question'),
+    url(r'^batch/$', views.BatchView.as_view(), name='batch'),
 ]
 
 router = routers.SimpleRouter()
@@ -0,0 +1,63 @@
+import hashlib
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import F, Q, Max
+from .models import Question, Answer, Comment, LikeEvent, SimilarQuestion
+
+
+def bump_version(model, pk, instance=None):
+    """
+    Increment the version of the question a changed object belongs to:
+    the question itself or the question of an answer. Mirrors the change
+    on an in-memory question instance, if given.
+    """
+    if model is Question:
+        Question.objects.filter(pk=pk).update(version=F('version') + 1)
+        if isinstance(instance, Question) and instance.pk == pk:
+            instance.version += 1
+    elif model is Answer:
+        Question.objects.filter(answers__pk=pk).update(version=F('version') + 1)
+
+
+def bump_versions(**lookup):
+    """
+    Increment the versions of all the questions matching lookup, e.g.
+    the questions of a renamed tag.
+    """
+    Question.objects.filter(**lookup).update(version=F('version') + 1)
+
+
+def comment_authors_updated_at(pk):
+    """
+    Last edit of the authors of the comments on a question and on its
+    answers, which payloads embed.
+    """
+    condition = Q(content_type=ContentType.objects.get_for_model(Question), object_id=pk) | Q(
+        content_type=ContentType.objects.get_for_model(Answer),
+        object_id__in=Answer.objects.filter(question_id=pk).values('id'))
+    return Comment.objects.filter(condition).aggregate(last=Max('author__updated_at'))['last']
+
+
+def question_etag(request, pk, with_similar=False, with_pending_likes=False):
+    """
+    ETag of a question page or payload computed from a couple of indexed
+    lookups, without loading the question. The version and last edit of
+    the question cover its answers, comments, likes and tags, the last
+    edits of the authors of the question, its answers and comments cover
+    the embedded accounts. The requesting user and the query string cover
+    what differs between requests.
+    Payloads showing already_liked also depend on the pending like events
+    of the user. Return None if there is no such question.
+    """
+    row = (
+        Question.objects.filter(pk=pk).annotate(answers_authors=Max('answers__author__updated_at'))
+        .values_list('version', 'updated_at', 'author__updated_at', 'answers_authors').first()
+    )
+    if row is None:
+        return None
+    parts = [pk] + list(row) + [comment_authors_updated_at(pk)] + [request.user.pk, request.get_full_path(), getattr(request, 'accepted_media_type', '')]
+    if with_pending_likes and request.user.is_authenticated():
+        parts.append(LikeEvent.objects.filter(author=request.user).aggregate(last=Max('id'))['last'])
+    if with_similar:
+        parts += SimilarQuestion.objects.filter(question_id=pk).order_by('similar_id').values_list(
+            'similar_id', 'similar__version')
+    return hashlib.md5(':'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
@@ -1,31 +1,77 @@
-from django.views.generic import ListView, DetailView
+import logging
+from datetime import datetime, time
+from django.views.generic import View, ListView, DetailView
 from django.views.generic.edit import FormView
-from django.core.paginator import Paginator
 from django.core.urlresolvers import reverse_lazy
 from django.shortcuts import get_object_or_404
-from django.http import HttpResponseRedirect
-from django.db.models import Q
+from django.contrib.contenttypes.models import ContentType
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.http import (
+    HttpResponseRedirect,
+    HttpResponseForbidden,
+    HttpResponseBadRequest,
+    StreamingHttpResponse,
+    Http404,
+)
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from django.db import transaction, DatabaseError
+from django.core.exceptions import ValidationError as ModelValidationError
 from rest_framework import status
+from rest_framework.views import APIView
+from rest_framework.exceptions import ValidationError
 from rest_framework.viewsets import ViewSet, ModelViewSet
 from rest_framework.response import Response
 from rest_framework.decorators import detail_route
-from .models import Question, Answer, Comment, Like, Tag
+from tost.streaming import StreamingListMixin
+from tost.identity import get_identity_map
+from .models import Question, Answer, Comment, Tag, TaggedQuestion, SimilarQuestion
 from .forms import AddQuestionForm
+from .search import search_questions, rank
+from .pagination import KeysetPaginator, LinkHeaderCursorPagination, CommentsCursorPagination
+from .cards import render_cards
+from .versioning import question_etag
+from .likes import like_object, unlike_object, toggle_object_like, shown_likes_count
+from .read_serializers import QuestionReadSerializer, AnswerReadSerializer, read_changes
+from .changes import latest_cursor
+from .events import question_events
 from .serializers import (
     QuestionSerializer,
     AnswerSerializer,
     NestedCommentSerializer,
-    NestedLikeSerializer,
 )
 from .permissions import (
+    is_owner,
     IsAuthenticatedOrNotAllowed,
     IsOwnerOrReadOnly,
     IsOwnerOrQOwnerOrReadOnly,
 )
 
+
+logger = logging.getLogger(__name__)
+
+
 # Create your views here.
 
 
+# ============================================
+# =============== ETags ======================
+# ============================================
+
+
+def question_page_etag(request, pk):
+    return question_etag(request, pk, with_similar=True)
+
+
+def question_payload_etag(request, pk=None):
+    return question_etag(request, pk, with_pending_likes=True)
+
+
+def answers_payload_etag(request, question_pk=None):
+    return question_etag(request, question_pk, with_pending_likes=True)
+
+
 # ============================================
 # =============== Mixins =====================
 # ============================================
@@ -43,8 +89,7 @@ class SearchFieldMixin(object):
 
     def get_queryset(self):
         if self.request.GET.get('q'):
-            q = self.request.GET['q']
-            return Question.objects.filter(Q(summary__icontains=q) | Q(content__icontains=q))
+            return search_questions(self.request.GET['q'])
         else:
             return Question.objects.all()
 
@@ -61,20 +106,47 @@ class SearchFieldMixin(object):
         elif self.type == 'unanswered':
             data['title'] = 'Questions without answer'
         elif self.type == 'by_tag_id':
-            tag = get_object_or_404(Tag, pk=self.kwargs['pk'])
-            data['title'] = 'Questions tagged with #%s' % tag.name
+            tag = data['tag'] = self.get_tag()
+            data['title'] = 'Questions tagged with #%s (%d)' % (tag.name, tag.questions_count)
+        elif self.type == 'best_by_tag_id':
+            tag = data['tag'] = self.get_tag()
+            data['title'] = 'Best questions tagged with #%s (%d)' % (tag.name, tag.questions_count)
         return data
 
 
 class PaginatedResponseMixin(object):
+    paginate_by = 6
+    paginate_ordering = ('-created_at', '-id')
+
+    def get_paginate_ordering(self):
+        return self.paginate_ordering
+
+    def paginate_queryset(self, queryset, page_size):
+        """
+        Keyset pagination driven by the `cursor` GET parameter.
+        Returns the same tuple as MultipleObjectMixin.paginate_queryset.
+        """
+        paginator = KeysetPaginator(queryset, page_size, self.get_paginate_ordering())
+        page = paginator.page(self.request.GET.get('cursor'))
+        return paginator, page, page.object_list, page.has_next() or page.has_previous()
 
     def get_context_data(self, **kwargs):
         data = super(PaginatedResponseMixin, self).get_context_data(**kwargs)
-        questions = data['questions']
-        paginator = Paginator(questions, 6)
-        # process exception
-        page_num = self.request.GET.get('page', 1)
-        data['questions'] = paginator.page(page_num)
+        page = data['page_obj']
+        data['questions'] = page
+        data['cards'] = render_cards(page.object_list)
+        data['pager'] = []
+        for number, cursor in page.window:
+            params = self.request.GET.copy()
+            params.pop('page', None)
+            params.pop('cursor', None)
+            if cursor:
+                params['cursor'] = cursor
+            data['pager'].append({
+                'number': number,
+                'query': params.urlencode(),
+                'current': number == page.number,
+            })
         return data
 
 
@@ -88,20 +160,17 @@ class QuestionsListView(RedirectAnonUserMixin, SearchFieldMixin, PaginatedRespon
     context_object_name = 'questions'
     type = 'latest'
 
-    def get_queryset(self):
-        queryset = super(QuestionsListView, self).get_queryset()
-        return queryset.order_by('-created_at')
+    def get_paginate_ordering(self):
+        if self.request.GET.get('q'):
+            return ('search_rank', 'id')
+        return self.paginate_ordering
 
 
 class BestQuestionsListView(RedirectAnonUserMixin, SearchFieldMixin, PaginatedResponseMixin, ListView):
     template_name = 'questions/questions_list.html'
     context_object_name = 'questions'
     type = 'best'
-
-    def get_queryset(self):
-        queryset = super(BestQuestionsListView, self).get_queryset()
-        # maybe performance bottleneck
-        return sorted(queryset, key=lambda quest: quest.likes_count, reverse=True)
+    paginate_ordering = ('-score', '-id')
 
 
 class UnansweredQuestionsListView(RedirectAnonUserMixin, SearchFieldMixin, PaginatedResponseMixin, ListView):
@@ -111,8 +180,7 @@ class UnansweredQuestionsListView(RedirectAnonUserMixin, SearchFieldMixin, Pagin
 
     def get_queryset(self):
         queryset = super(UnansweredQuestionsListView, self).get_queryset()
-        # may also be performance bottleneck
-        return [quest for quest in queryset if quest.answers_count == 0]
+        return queryset.filter(answers_count=0)
 
 
 class ByTagIdQuestionsListView(RedirectAnonUserMixin, SearchFieldMixin, PaginatedResponseMixin, ListView):
@@ -120,10 +188,31 @@ class ByTagIdQuestionsListView(RedirectAnonUserMixin, SearchFieldMixin, Paginate
     context_object_name = 'questions'
     type = 'by_tag_id'
 
+    def get_tag(self):
+        if not hasattr(self, 'tag'):
+            self.tag = get_object_or_404(Tag, pk=self.kwargs['pk'])
+        return self.tag
+
     def get_queryset(self):
-        queryset = super(ByTagIdQuestionsListView, self).get_queryset()
-        tag = get_object_or_404(Tag, pk=self.kwargs['pk'])
-        return queryset.filter(tags=tag)
+        """
+        Entries of the materialized tag feed, sorted through the
+        (tag, created_at) or (tag, score) index and joined to their questions.
+        """
+        entries = TaggedQuestion.objects.filter(tag=self.get_tag()).select_related('question')
+        if self.request.GET.get('q'):
+            entries = entries.filter(question_id__in=rank(self.request.GET['q']))
+        return entries
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator, page, entries, is_paginated = super(ByTagIdQuestionsListView, self).paginate_queryset(
+            queryset, page_size)
+        page.object_list = [entry.question for entry in entries]
+        return paginator, page, page.object_list, is_paginated
+
+
+class BestByTagIdQuestionsListView(ByTagIdQuestionsListView):
+    type = 'best_by_tag_id'
+    paginate_ordering = ('-score', '-id')
 
 
 class QuestionsDetailView(RedirectAnonUserMixin, DetailView):
@@ -131,48 +220,47 @@ class QuestionsDetailView(RedirectAnonUserMixin, DetailView):
     template_name = 'questions/questions_detail.html'
     context_object_name = 'question'
 
-    def get_similar(self, tags, q_id, result=None):
-        """
-        Method to select similar to the gived one (q_id) questions.
-        Algorithm filters questions in for-cycle by the inclusion of
-        all the tags. If the quantity of questions is not enough (<4),
-        one of the tags, which was included in the fewest number of questions
-        is removed and method recursively calls itself.
-        """
-        temp_result = Question.objects.all()
-        scores = {}
-        for tag in tags:
-            if scores.get(tag.name, False):
-                scores[tag.name] += 1
-            else:
-                scores[tag.name] = 1
-            temp_result = temp_result.filter(tags=tag)
-        if result == None:
-            fin_result = temp_result.exclude(pk=q_id)
-        else:
-            fin_result = result | temp_result.exclude(pk=q_id).distinct()
-        fin_result = fin_result.distinct()
-        if fin_result.count() >= 4:
-            return fin_result[:4]
-        elif len(tags) == 0:
-            return fin_result
-        else:
-            min_val, min_name = Question.objects.count(), ''
-            for name in scores:
-                if min_val > scores[name]:
-                    min_name, min_val = name, scores[name]
-            tags = tags.exclude(name=min_name) 
-            return self.get_similar(tags, q_id, result=fin_result)
+    @method_decorator(condition(etag_func=question_page_etag))
+    def get(self, request, *args, **kwargs):
+        return super(QuestionsDetailView, self).get(request, *args, **kwargs)
+
+    def get_queryset(self):
+        return Question.objects.select_related('author').prefetch_related('tags')
 
     def get_context_data(self, **kwargs):
         data = super(QuestionsDetailView, self).get_context_data(**kwargs)
-        match_list = []
-        question = get_object_or_404(Question, pk=self.kwargs['pk'])
-        tags = question.tags.all()
-        data['similar'] = self.get_similar(tags, question.id)
+        data['similar'] = [
+            entry.similar for entry in
+            SimilarQuestion.objects.filter(question=self.object).select_related('similar').order_by('-score', '-similar')
+        ]
         return data
 
 
+class QuestionEventsView(View):
+    """
+    Server-sent events of the answers, comments, likes and solution marks
+    of a question, starting after the Last-Event-ID header or the `since`
+    cursor, or from now on. Every response is a short long-poll, see
+    question_events().
+    """
+
+    def get(self, request, pk):
+        if not request.user.is_authenticated():
+            return HttpResponseForbidden()
+        question = get_object_or_404(Question, pk=pk)
+        since = request.META.get('HTTP_LAST_EVENT_ID') or request.GET.get('since')
+        try:
+            cursor = int(since) if since else latest_cursor(question.pk)
+        except ValueError:
+            return HttpResponseBadRequest()
+        response = StreamingHttpResponse(
+            question_events(request, question.pk, cursor),
+            content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+
 class AddQuestionView(RedirectAnonUserMixin, FormView):
     form_class = AddQuestionForm
     template_name = 'questions/add_question.html'
@@ -191,17 +279,28 @@ class AddQuestionView(RedirectAnonUserMixin, FormView):
 # =========================================================
 
 
-class QuestionsViewSet(ViewSet):
+class QuestionsViewSet(StreamingListMixin, ViewSet):
     serializer_class = QuestionSerializer
     permission_classes = (
         IsAuthenticatedOrNotAllowed,
         IsOwnerOrReadOnly,
     )
 
+    pagination_class = LinkHeaderCursorPagination
+
     def list(self, request):
-        queryset = Question.objects.all()
-        serializer = QuestionSerializer(queryset, many=True, context={'request': request})
-        return Response(serializer.data)
+        """
+        Cursor paginated list of questions, or all of them streamed with
+        `stream`. Nested answers and comments are serialized only when
+        named in `expand`. Pages are read from .values() rows.
+        """
+        queryset = Question.objects.only('id', 'created_at')
+        if self.wants_stream(request):
+            return self.stream_list(request, queryset.order_by('-created_at'), QuestionReadSerializer)
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = QuestionReadSerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
 
     def create(self, request):
         serializer = QuestionSerializer(data=request.data, context={'request': request})
@@ -211,14 +310,17 @@ class QuestionsViewSet(ViewSet):
         else:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @method_decorator(condition(etag_func=question_payload_etag))
     def retrieve(self, request, pk=None):
-        question = get_object_or_404(Question, pk=pk)
-        serializer = QuestionSerializer(question, context={'request': request})
-        return Response(serializer.data)
+        queryset = Question.objects.filter(pk=pk)
+        data = QuestionReadSerializer(queryset, context={'request': request}, expand_all=True).data
+        if data is None:
+            raise Http404
+        return Response(data)
 
     def update(self, request, pk=None):
         question = get_object_or_404(Question, pk=pk)
-        if request.user != question.author:
+        if not is_owner(request.user, question):
             return Response(status=status.HTTP_403_FORBIDDEN)
         serializer = QuestionSerializer(question, data=request.data, context={'request': request})
         if serializer.is_valid():
@@ -229,7 +331,7 @@ class QuestionsViewSet(ViewSet):
 
     def destroy(self, request, pk=None):
         question = get_object_or_404(Question, pk=pk)
-        if question.author != request.user:
+        if not is_owner(request.user, question):
             return Response(status=status.HTTP_403_FORBIDDEN)
         question.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
@@ -247,27 +349,43 @@ class QuestionsViewSet(ViewSet):
     @detail_route(methods=['post'])
     def like_it(self, request, pk=None):
         question = get_object_or_404(Question, pk=pk)
-        serializer = NestedLikeSerializer(data=request.data)
-        if serializer.is_valid():
-            for like in Like.objects.all():
-                if like.author == request.user and like.content_object == question:
-                    return Response(status=status.HTTP_400_BAD_REQUEST)
-            serializer.save(content_object=question, author=request.user)
-            return Response(status=status.HTTP_201_CREATED)
-        else:
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if not like_object(request.user, question):
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+        return Response(status=status.HTTP_201_CREATED)
 
     @detail_route(methods=['delete'])
     def dislike_it(self, request, pk=None):
         question = get_object_or_404(Question, pk=pk)
-        for like in Like.objects.all():
-            if like.author == request.user and like.content_object == question:
-                like.delete()
-                return Response(status=status.HTTP_204_NO_CONTENT)
-        return Response(status=status.HTTP_404_NOT_FOUND)
+        if not unlike_object(request.user, question):
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @detail_route(methods=['get'])
+    def changes(self, request, pk=None):
+        """
+        Answers, comments and like counters of the question changed since
+        the `since` cursor, with tombstones of deleted answers and comments.
+        Without `since` only the current cursor is returned, and so is with
+        `resync` when the changes after `since` have been pruned.
+        """
+        question = get_object_or_404(Question, pk=pk)
+        since = request.query_params.get('since')
+        if since is None:
+            return Response({'cursor': str(latest_cursor(question.pk))})
+        try:
+            since = int(since)
+        except ValueError:
+            return Response({'since': ['Invalid cursor.']}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(read_changes(request, question.pk, since))
+
+    @detail_route(methods=['post'])
+    def toggle_like(self, request, pk=None):
+        question = get_object_or_404(Question, pk=pk)
+        liked = toggle_object_like(request.user, question)
+        return Response({'liked': liked, 'likes_count': shown_likes_count(request.user, question)})
 
 
-class AnswersViewSet(ViewSet):
+class AnswersViewSet(StreamingListMixin, ViewSet):
     queryset = Answer.objects.all()
     serializer_class = AnswerSerializer
     permission_classes = (
@@ -275,10 +393,26 @@ class AnswersViewSet(ViewSet):
         IsOwnerOrQOwnerOrReadOnly,
     )
 
+    def get_answer(self, request, question_pk, pk):
+        """
+        Return the question and the answer of the url. Both go through the
+        identity map of the request and the answer shares its question.
+        """
+        identity_map = get_identity_map(request)
+        question = identity_map.get(Question, question_pk)
+        if question is None:
+            raise Http404
+        answer = identity_map.add(get_object_or_404(Answer, question=question, pk=pk))
+        identity_map.attach([answer], 'question')
+        return question, answer
+
+    @method_decorator(condition(etag_func=answers_payload_etag))
     def list(self, request, question_pk=None):
         question = get_object_or_404(Question, pk=question_pk)
         queryset = Answer.objects.filter(question=question)
-        serializer = AnswerSerializer(queryset, many=True, context={'request': request})
+        if self.wants_stream(request):
+            return self.stream_list(request, queryset, AnswerReadSerializer)
+        serializer = AnswerReadSerializer(queryset, many=True, context={'request': request})
         return Response(serializer.data)
 
     def create(self, request, question_pk=None):
@@ -291,15 +425,13 @@ class AnswersViewSet(ViewSet):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def retrieve(self, request, question_pk=None, pk=None):
-        question = get_object_or_404(Question, pk=question_pk)
-        answer = get_object_or_404(Answer, question=question, pk=pk)
+        question, answer = self.get_answer(request, question_pk, pk)
         serializer = AnswerSerializer(answer, context={'request': request})
         return Response(serializer.data)
 
     def update(self, request, question_pk=None, pk=None):
-        question = get_object_or_404(Question, pk=question_pk)
-        answer = get_object_or_404(Answer, question=question, pk=pk)
-        if request.user != answer.author:
+        question, answer = self.get_answer(request, question_pk, pk)
+        if not is_owner(request.user, answer):
             return Response(status=status.HTTP_403_FORBIDDEN)
         serializer = AnswerSerializer(answer, data=request.data, context={'request': request})
         if serializer.is_valid():
@@ -309,17 +441,15 @@ class AnswersViewSet(ViewSet):
             return Response(serializer.errors, status.HTTP_400_BAD_REQUEST)
 
     def destroy(self, request, question_pk=None, pk=None):
-        question = get_object_or_404(Question, pk=question_pk)
-        answer = get_object_or_404(Answer, question=question, pk=pk)
-        if request.user != answer.author:
+        question, answer = self.get_answer(request, question_pk, pk)
+        if not is_owner(request.user, answer):
             return Response(status=status.HTTP_403_FORBIDDEN)
         answer.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @detail_route(methods=['post'])
     def comment_it(self, request, question_pk=None, pk=None):
-        question = get_object_or_404(Question, pk=question_pk)
-        answer = get_object_or_404(Answer, question=question, pk=pk)
+        question, answer = self.get_answer(request, question_pk, pk)
         serializer = NestedCommentSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
             serializer.save(content_object=answer, author=request.user)
@@ -329,33 +459,28 @@ class AnswersViewSet(ViewSet):
 
     @detail_route(methods=['post'])
     def like_it(self, request, question_pk=None, pk=None):
-        question = get_object_or_404(Question, pk=question_pk)
-        answer = get_object_or_404(Answer, question=question, pk=pk)
-        serializer = NestedLikeSerializer(data=request.data)
-        if serializer.is_valid():
-            for like in Like.objects.all():
-                if like.author == request.user and like.content_object == answer:
-                    return Response(status=status.HTTP_400_BAD_REQUEST)
-            serializer.save(content_object=answer, author=request.user)
-            return Response(status=status.HTTP_201_CREATED)
-        else:
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        question, answer = self.get_answer(request, question_pk, pk)
+        if not like_object(request.user, answer):
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+        return Response(status=status.HTTP_201_CREATED)
 
     @detail_route(methods=['delete'])
     def dislike_it(self, request, question_pk=None, pk=None):
-        question = get_object_or_404(Question, pk=question_pk)
-        answer = get_object_or_404(Answer, question=question, pk=pk)
-        for like in Like.objects.all():
-            if like.author == request.user and like.content_object == answer:
-                like.delete()
-                return Response(status=status.HTTP_204_NO_CONTENT)
-        return Response(status=status.HTTP_404_NOT_FOUND)
+        question, answer = self.get_answer(request, question_pk, pk)
+        if not unlike_object(request.user, answer):
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @detail_route(methods=['post'])
+    def toggle_like(self, request, question_pk=None, pk=None):
+        question, answer = self.get_answer(request, question_pk, pk)
+        liked = toggle_object_like(request.user, answer)
+        return Response({'liked': liked, 'likes_count': shown_likes_count(request.user, answer)})
 
     @detail_route(methods=['patch'])
     def mark_as_solution(self, request, question_pk=None, pk=None):
-        question = get_object_or_404(Question, pk=question_pk)
-        answer = get_object_or_404(Answer, question=question, pk=pk)
-        if question.author != request.user:
+        question, answer = self.get_answer(request, question_pk, pk)
+        if not is_owner(request.user, question):
             return Response(status=status.HTTP_403_FORBIDDEN)
         answer.solution = True
         answer.save()
@@ -363,9 +488,8 @@ class AnswersViewSet(ViewSet):
 
     @detail_route(methods=['patch'])
     def remove_solution_mark(self, request, question_pk=None, pk=None):
-        question = get_object_or_404(Question, pk=question_pk)
-        answer = get_object_or_404(Answer, question=question, pk=pk)
-        if question.author != request.user:
+        question, answer = self.get_answer(request, question_pk, pk)
+        if not is_owner(request.user, question):
             return Response(status=status.HTTP_403_FORBIDDEN)
         answer.solution = False
         answer.save()
@@ -373,6 +497,162 @@ class AnswersViewSet(ViewSet):
 
 
 class CommentsViewSet(ModelViewSet):
+    """
+    Comments, cursor paginated oldest first. The list can be narrowed down
+    with `question` or `answer` (comments on that object), `author` and
+    a `created_after`/`created_before` range of ISO 8601 datetimes.
+    """
     queryset = Comment.objects.all()
     serializer_class = NestedCommentSerializer
-    permission_classes = (IsAuthenticatedOrNotAllowed, IsOwnerOrReadOnly)
\ No newline at end of file
+    permission_classes = (IsAuthenticatedOrNotAllowed, IsOwnerOrReadOnly)
+    pagination_class = CommentsCursorPagination
+
+    @staticmethod
+    def parse_param(params, name, parse):
+        value = params.get(name)
+        if value in (None, ''):
+            return None
+        parsed = parse(value)
+        if parsed is None:
+            raise ValidationError({name: 'Invalid value.'})
+        return parsed
+
+    @staticmethod
+    def parse_id(value):
+        return int(value) if value.isdigit() else None
+
+    @staticmethod
+    def parse_moment(value):
+        try:
+            moment = parse_datetime(value)
+            if moment is None:
+                day = parse_date(value)
+                moment = datetime.combine(day, time.min) if day is not None else None
+        except ValueError:
+            return None
+        if moment is not None and timezone.is_naive(moment):
+            moment = timezone.make_aware(moment, timezone.utc)
+        return moment
+
+    def get_queryset(self):
+        queryset = Comment.objects.select_related('author')
+        if self.action != 'list':
+            return queryset
+        params = self.request.query_params
+        for name, model in (('question', Question), ('answer', Answer)):
+            object_id = self.parse_param(params, name, self.parse_id)
+            if object_id is not None:
+                content_type = ContentType.objects.get_for_model(model)
+                queryset = queryset.filter(content_type=content_type, object_id=object_id)
+        author = self.parse_param(params, 'author', self.parse_id)
+        if author is not None:
+            queryset = queryset.filter(author_id=author)
+        created_after = self.parse_param(params, 'created_after', self.parse_moment)
+        if created_after is not None:
+            queryset = queryset.filter(created_at__gte=created_after)
+        created_before = self.parse_param(params, 'created_before', self.parse_moment)
+        if created_before is not None:
+            queryset = queryset.filter(created_at__lt=created_before)
+        return queryset
+
+
+class BatchView(APIView):
+    """
+    Runs a list of operations on questions and answers in one transaction:
+
+        [{"op": "like", "question": 1, "answer": 2},
+         {"op": "comment", "question": 1, "content": "..."}]
+
+    Operations are like, unlike, comment, mark_as_solution and
+    remove_solution_mark. An operation targets the answer if given, the
+    question otherwise. All the questions and answers are loaded once,
+    and every operation gets its own {"status": ..., "data": ...} result.
+    A failing operation, including one raising a database error, is rolled
+    back alone and the others are still committed.
+    """
+    permission_classes = (IsAuthenticatedOrNotAllowed,)
+    max_operations = 50
+    operations = ('like', 'unlike', 'comment', 'mark_as_solution', 'remove_solution_mark')
+
+    @staticmethod
+    def parse_id(operation, key):
+        try:
+            return int(operation.get(key))
+        except (TypeError, ValueError):
+            return None
+
+    def load_targets(self, operations):
+        identity_map = get_identity_map(self.request)
+        question_ids = set(self.parse_id(operation, 'question') for operation in operations)
+        answer_ids = set(self.parse_id(operation, 'answer') for operation in operations)
+        questions = identity_map.get_many(Question, [pk for pk in question_ids if pk is not None])
+        answers = identity_map.get_many(Answer, [pk for pk in answer_ids if pk is not None])
+        return questions, answers
+
+    def post(self, request):
+        operations = request.data
+        if not isinstance(operations, list) or len(operations) > self.max_operations \
+                or not all(isinstance(operation, dict) for operation in operations):
+            return Response(
+                {'detail': 'Expected a list of at most %d operations.' % self.max_operations},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        questions, answers = self.load_targets(operations)
+        with transaction.atomic():
+            results = [self.run(request, operation, questions, answers) for operation in operations]
+        return Response(results)
+
+    def run(self, request, operation, questions, answers):
+        if operation.get('op') not in self.operations:
+            return {'status': status.HTTP_400_BAD_REQUEST, 'data': {'detail': 'Unknown operation.'}}
+        question = questions.get(self.parse_id(operation, 'question'))
+        answer = None
+        if 'answer' in operation:
+            answer = answers.get(self.parse_id(operation, 'answer'))
+            if answer is None or question is None or answer.question_id != question.pk:
+                return {'status': status.HTTP_404_NOT_FOUND}
+            answer.question = question
+        if question is None:
+            return {'status': status.HTTP_404_NOT_FOUND}
+        try:
+            with transaction.atomic():
+                return getattr(self, operation['op'])(request, operation, question, answer)
+        except ValidationError as error:
+            return {'status': status.HTTP_400_BAD_REQUEST, 'data': error.detail}
+        except ModelValidationError as error:
+            return {'status': status.HTTP_400_BAD_REQUEST, 'data': {'detail': error.messages}}
+        except DatabaseError:
+            logger.exception('Batch operation %s failed', operation['op'])
+            return {'status': status.HTTP_500_INTERNAL_SERVER_ERROR}
+
+    def like(self, request, operation, question, answer):
+        if not like_object(request.user, answer or question):
+            return {'status': status.HTTP_400_BAD_REQUEST}
+        return {'status': status.HTTP_201_CREATED}
+
+    def unlike(self, request, operation, question, answer):
+        if not unlike_object(request.user, answer or question):
+            return {'status': status.HTTP_404_NOT_FOUND}
+        return {'status': status.HTTP_204_NO_CONTENT}
+
+    def comment(self, request, operation, question, answer):
+        serializer = NestedCommentSerializer(data={'content': operation.get('content')}, context={'request': request})
+        if not serializer.is_valid():
+            return {'status': status.HTTP_400_BAD_REQUEST, 'data': serializer.errors}
+        serializer.save(content_object=answer or question, author=request.user)
+        return {'status': status.HTTP_201_CREATED, 'data': serializer.data}
+
+    def set_solution(self, request, question, answer, solution):
+        if answer is None:
+            return {'status': status.HTTP_400_BAD_REQUEST, 'data': {'detail': 'Answer is required.'}}
+        if not is_owner(request.user, question):
+            return {'status': status.HTTP_403_FORBIDDEN}
+        answer.solution = solution
+        answer.save()
+        return {'status': status.HTTP_200_OK}
+
+    def mark_as_solution(self, request, operation, question, answer):
+        return self.set_solution(request, question, answer, True)
+
+    def remove_solution_mark(self, request, operation, question, answer):
+        return self.set_solution(request, question, answer, False)
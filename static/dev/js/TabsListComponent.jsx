@@ -1,17 +1,52 @@
 var React = require('react'),
-	baseUrl = require('./utils').baseUrl;
+	baseUrl = require('./utils').baseUrl,
+	accountRowsUrl = require('./XHR').accountRowsUrl,
+	getAccountRowsXHR = require('./XHR').getAccountRowsXHR;
 
 
 class TabsListComponent extends React.Component {
 
 	constructor(props) {
 		super(props);
+		// The account payload only embeds the latest rows, the rest is
+		// paged through the account questions and answers routes.
+		let data = this.props.data;
 		this.state = {
-			currentTab: 'questions'
+			currentTab: 'questions',
+			rows: {
+				questions: data.own_questions,
+				answers: data.own_answers
+			},
+			next: {
+				questions: data.questions_count > data.own_questions.length ? accountRowsUrl('questions') : null,
+				answers: data.answers_count > data.own_answers.length ? accountRowsUrl('answers') : null
+			},
+			loading: false
 		};
 		this.chooseQuestions = this.chooseQuestions.bind(this);
 		this.chooseAnswers = this.chooseAnswers.bind(this);
 		this.getData = this.getData.bind(this);
+		this.loadMore = this.loadMore.bind(this);
+	}
+
+	loadMore() {
+		let tab = this.state.currentTab;
+		if (this.state.loading || !this.state.next[tab]) {
+			return;
+		}
+		this.setState({loading: true});
+		getAccountRowsXHR(this.state.next[tab])
+			.then(result => {
+				let rows = Object.assign({}, this.state.rows),
+					next = Object.assign({}, this.state.next),
+					known = {};
+				rows[tab].forEach(row => { known[row.id] = true; });
+				rows[tab] = rows[tab].concat(result.rows.filter(row => !known[row.id]));
+				next[tab] = result.next;
+				this.setState({rows: rows, next: next, loading: false});
+			}, error => {
+				this.setState({loading: false});
+			});
 	}
 
 	chooseQuestions() {
@@ -28,8 +63,7 @@ class TabsListComponent extends React.Component {
 
 	getData() {
 		if (this.state.currentTab === 'questions') {
-			console.log('props', this.props.data);
-			return this.props.data.own_questions.map(question => {
+			return this.state.rows.questions.map(question => {
 				return (
 					<div className='question' key={question.id}>
 		                <h5>
@@ -53,7 +87,7 @@ class TabsListComponent extends React.Component {
 				);
 			});
 		} else {
-			return this.props.data.own_answers.map(answer => {
+			return this.state.rows.answers.map(answer => {
 				return (
 					<div className='question' key={answer.id}>
 						<h5>{answer.content}</h5>
@@ -86,6 +120,10 @@ class TabsListComponent extends React.Component {
 					<span className={'label ' + aClass} onClick={this.chooseAnswers}>Answers</span>
 				</div>
 				<div className='question-wrapper question-profile-wrapper'>{data}</div>
+				{this.state.next[this.state.currentTab] ?
+					<span className='label label-default profile-more' onClick={this.loadMore}>
+						{this.state.loading ? 'Loading...' : 'Load more'}
+					</span> : null}
 			</div>
 		);
 	}
@@ -4,6 +4,12 @@ var baseUrl = require('./utils').baseUrl,
 	questionId = require('./utils').questionId;
 
 
+function parseNextLink(header) {
+	let match = /<([^>]+)>;\s*rel="next"/.exec(header || '');
+	return match ? match[1] : null;
+}
+
+
 module.exports = {
 
 	getDataXHR() {
@@ -44,6 +50,31 @@ module.exports = {
 		});
 	},
 
+	accountRowsUrl(kind) {
+		return baseUrl + '/account/accounts/' + accountId + '/' + kind + '/';
+	},
+
+	getAccountRowsXHR(url) {
+		return new Promise(function(resolve, reject) {
+			var request = new XMLHttpRequest();
+
+			request.onload = function() {
+				let response = JSON.parse(this.responseText);
+				if (this.status == 200) {
+					resolve({
+						rows: response,
+						next: parseNextLink(this.getResponseHeader('Link'))
+					});
+				} else {
+					reject(response);
+				}
+			}
+
+			request.open('GET', url, true);
+			request.send(null);
+		});
+	},
+
 	likeXHR(url) {
 		return new Promise(function(resolve, reject) {
 			var request = new XMLHttpRequest();
@@ -0,0 +1,113 @@
+import logging
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
+
+logger = logging.getLogger(__name__)
+
+
+class IdentityMap(object):
+    """
+    Request scoped registry of loaded model instances. Every row is loaded
+    at most once per request and the same instance is shared by the views,
+    permissions and serializers handling it. hits and misses count the
+    lookups answered from the map and from the database.
+    """
+
+    def __init__(self):
+        self.objects = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(model, pk):
+        return model._meta.concrete_model, model._meta.pk.to_python(pk)
+
+    def add(self, instance):
+        """
+        Register an instance and return the shared one, which is the
+        instance registered first.
+        """
+        return self.objects.setdefault(self.key(instance.__class__, instance.pk), instance)
+
+    def get_many(self, model, pks):
+        """
+        Return a {pk: instance} dict of the rows of model with the given
+        primary keys, loading the ones not in the map with a single query.
+        """
+        found, missing = {}, set()
+        for pk in pks:
+            key = self.key(model, pk)
+            if key in self.objects:
+                found[key[1]] = self.objects[key]
+            else:
+                missing.add(key[1])
+        self.hits += len(found)
+        self.misses += len(missing)
+        if missing:
+            for instance in model._default_manager.filter(pk__in=missing):
+                found[instance.pk] = self.add(instance)
+        return found
+
+    def get(self, model, pk):
+        try:
+            return self.get_many(model, [pk]).get(self.key(model, pk)[1])
+        except (TypeError, ValueError, ValidationError):
+            return None
+
+    def attach(self, instances, field_name):
+        """
+        Point the foreign key field_name of every instance at the shared
+        related object, loading the missing ones with a single query.
+        """
+        instances = list(instances)
+        if not instances:
+            return instances
+        field = instances[0]._meta.get_field(field_name)
+        cache_name = field.get_cache_name()
+        pending = []
+        for instance in instances:
+            if cache_name in instance.__dict__:
+                if instance.__dict__[cache_name] is not None:
+                    setattr(instance, cache_name, self.add(instance.__dict__[cache_name]))
+            elif getattr(instance, field.attname) is not None:
+                pending.append(instance)
+        if pending:
+            related = self.get_many(field.rel.to, set(getattr(instance, field.attname) for instance in pending))
+            for instance in pending:
+                setattr(instance, cache_name, related.get(getattr(instance, field.attname)))
+        return instances
+
+
+def get_identity_map(request):
+    """
+    Return the identity map of a request, created on first use when the
+    middleware is not installed. The requesting user is always in it.
+    """
+    if request is None:
+        return IdentityMap()
+    identity_map = getattr(request, 'identity_map', None)
+    if identity_map is None:
+        identity_map = request.identity_map = IdentityMap()
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated():
+        identity_map.add(user)
+    return identity_map
+
+
+class IdentityMapMiddleware(object):
+    """
+    Gives every request an identity map. With DEBUG on, its hits and
+    misses are logged and sent in the X-Identity-Map response header.
+    """
+
+    def process_request(self, request):
+        request.identity_map = IdentityMap()
+
+    def process_response(self, request, response):
+        identity_map = getattr(request, 'identity_map', None)
+        if identity_map is not None and settings.DEBUG:
+            stats = 'hits=%d; misses=%d' % (identity_map.hits, identity_map.misses)
+            logger.debug('Identity map of %s: %s', request.path, stats)
+            response['X-Identity-Map'] = stats
+        return response
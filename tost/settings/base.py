@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/1.8/ref/settings/
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 import os
+from datetime import timedelta
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -45,6 +46,7 @@ MIDDLEWARE_CLASSES = (
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.auth.middleware.SessionAuthenticationMiddleware',
+    'tost.identity.IdentityMapMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'django.middleware.security.SecurityMiddleware',
@@ -86,6 +88,41 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/1.8/topics/cache/
+# MEMCACHED_LOCATION points the default cache at a memcached shared by all
+# the worker processes. Without it the cache is local to every process, which
+# only suits data keyed by a version, like the question cards.
+
+MEMCACHED_LOCATION = os.environ.get('MEMCACHED_LOCATION')
+
+if MEMCACHED_LOCATION:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+            'LOCATION': MEMCACHED_LOCATION,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+QUESTIONS_CARDS_CACHE = 'default'
+
+
+# Sessions
+# With a shared cache sessions are read from it and written through to the
+# database. A per process cache would keep serving flushed sessions in the
+# other processes, so sessions stay in the database without one.
+
+if MEMCACHED_LOCATION:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    SESSION_CACHE_ALIAS = 'default'
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/1.8/topics/i18n/
 
@@ -110,4 +147,71 @@ MEDIA_URL = '/media/'
 
 # Authentication user model
 
-AUTH_USER_MODEL = 'account.Account'
\ No newline at end of file
+AUTH_USER_MODEL = 'account.Account'
+
+# With a shared cache the accounts of the sessions are cached, saving an
+# account drops its copy. ModelBackend still serves the sessions logged in
+# through it.
+
+if MEMCACHED_LOCATION:
+    AUTHENTICATION_BACKENDS = (
+        'account.backends.CachedModelBackend',
+        'django.contrib.auth.backends.ModelBackend',
+    )
+
+ACCOUNT_USER_CACHE = 'default'
+
+ACCOUNT_USER_CACHE_TIMEOUT = 3600
+
+
+# Questions ranking
+# Zero gravity ranks best questions by likes only, positive values add time decay
+
+QUESTIONS_SCORE_GRAVITY = 0
+
+# Likes of objects with at least this many likes are written to an event log
+# compacted by the compact-likes task, None writes all likes directly
+
+QUESTIONS_HOT_LIKES = 1000
+
+# Search terms found in more documents than this are skipped when the query has
+# rarer terms, None always reads every posting of every term
+
+QUESTIONS_SEARCH_MAX_POSTINGS = 10000
+
+# Hub waking up the question event streams. The in-process hub only reaches
+# streams of the same process, use questions.push.KombuHub with several workers
+
+QUESTIONS_PUSH_HUB = 'questions.push.InProcessHub'
+
+# Seconds a question event stream waits for changes before the client has to
+# reconnect. Each open stream holds a worker, so keep it short with sync workers.
+
+QUESTIONS_EVENTS_TIMEOUT = 25
+
+# Days the change log read by delta-syncing clients is kept. Clients with an
+# older cursor are told to resync
+
+QUESTIONS_CHANGES_RETENTION = 7
+
+
+# Celery periodic tasks
+
+CELERYBEAT_SCHEDULE = {
+    'compact-likes': {
+        'task': 'questions.tasks.compact_likes',
+        'schedule': timedelta(seconds=30),
+    },
+    'prune-question-changes': {
+        'task': 'questions.tasks.prune_question_changes',
+        'schedule': timedelta(days=1),
+    },
+}
+
+# Scores only decay with a positive gravity, otherwise likes keep them up to date
+
+if QUESTIONS_SCORE_GRAVITY:
+    CELERYBEAT_SCHEDULE['rebuild-question-scores'] = {
+        'task': 'questions.tasks.rebuild_question_scores',
+        'schedule': timedelta(minutes=30),
+    }
@@ -13,6 +13,17 @@ STATICFILES_DIRS = (
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 
+# The development server runs a single process, so its local memory cache
+# stands in for the shared one sessions and accounts are cached in
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+AUTHENTICATION_BACKENDS = (
+	'account.backends.CachedModelBackend',
+	'django.contrib.auth.backends.ModelBackend',
+)
+
+
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 EMAIL_USE_TLS = True
 EMAIL_HOST = 'smtp.gmail.com'
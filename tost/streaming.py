@@ -0,0 +1,45 @@
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+
+
+class StreamingListMixin(object):
+    """
+    Lets API list views stream their whole result as a JSON array when
+    the request has a true `stream` query parameter. The queryset is read
+    with .iterator() and serialized stream_chunk_size objects at a time,
+    so the memory used by a worker does not grow with the size of the result.
+    """
+    stream_chunk_size = 200
+
+    def wants_stream(self, request):
+        return request.query_params.get('stream', '').lower() in ('1', 'true')
+
+    def iter_chunks(self, queryset):
+        chunk = []
+        for obj in queryset.iterator():
+            chunk.append(obj)
+            if len(chunk) == self.stream_chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def stream_list(self, request, queryset, serializer_class, context=None):
+        """
+        Return a StreamingHttpResponse with the serialized objects of the
+        queryset. Every chunk gets a copy of the serializer context, so
+        per payload caches stay bounded by the chunk size.
+        """
+        context = context or {'request': request}
+        renderer = JSONRenderer()
+
+        def render():
+            yield b'['
+            separator = b''
+            for chunk in self.iter_chunks(queryset):
+                for item in serializer_class(chunk, many=True, context=dict(context)).data:
+                    yield separator + renderer.render(item)
+                    separator = b','
+            yield b']'
+
+        return StreamingHttpResponse(render(), content_type='application/json')